@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -5,8 +6,10 @@ from app.database import get_db
 from app.models.user import User
 from app.crud.user import get_user
 from app.core.security import verify_token
+from app.core.config import settings
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(
@@ -29,3 +32,26 @@ def get_current_user(
     if user is None:
         raise credentials_exception
     return user
+
+
+def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Текущий пользователь с правами администратора"""
+    if current_user.email not in settings.admin_emails:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
+
+
+def get_current_user_id_optional(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[int]:
+    """ID пользователя из JWT токена, если он передан (без запроса к БД)
+
+    Для публичных эндпоинтов: без токена или с невалидным токеном
+    запрос обрабатывается как анонимный.
+    """
+    if credentials is None:
+        return None
+    return verify_token(credentials.credentials)
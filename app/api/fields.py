@@ -0,0 +1,59 @@
+"""
+Выборочные поля в списках постов
+
+?fields=post_id,title,tickets_available — только перечисленные поля;
+?view=summary — поля карточки (без описания и активности комментариев).
+Из БД читаются только колонки, нужные для запрошенных полей (описание не
+загружается, без полей доступности не считаются бронирования), а ответ
+содержит только запрошенные поля. Без параметров — полный PostResponse.
+"""
+from functools import lru_cache
+from typing import FrozenSet, List, Optional
+from fastapi import HTTPException, Query, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter, create_model
+from app.schemas.post import PostResponse
+
+POST_FIELDS = tuple(PostResponse.model_fields)
+SUMMARY_FIELDS = frozenset({
+    "post_id", "title", "image_url", "tags", "event_at", "tickets_limit",
+    "tickets_available", "tickets_booked", "is_available", "is_booked_by_user",
+})
+
+
+def post_fields(
+    fields: Optional[str] = Query(
+        None, max_length=500, description="Поля ответа через запятую (например, post_id,title,is_available)"
+    ),
+    view: str = Query("full", pattern="^(full|summary)$", description="summary — поля карточки без описания")
+) -> Optional[FrozenSet[str]]:
+    """Запрошенные поля поста; None — все поля"""
+    if fields:
+        requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+        unknown = requested.difference(POST_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+            )
+        if requested:
+            return requested
+    if view == "summary":
+        return SUMMARY_FIELDS
+    return None
+
+
+@lru_cache(maxsize=256)
+def _sparse_adapter(fields: FrozenSet[str]) -> TypeAdapter:
+    """Схема списка из подмножества полей PostResponse (в порядке полной схемы)"""
+    model = create_model(
+        "PostFields",
+        **{name: (PostResponse.model_fields[name].annotation, ...) for name in POST_FIELDS if name in fields}
+    )
+    return TypeAdapter(List[model])
+
+
+def sparse_response(posts: List[dict], fields: FrozenSet[str]) -> Response:
+    """JSON-ответ только с полями fields (лишние ключи строк отбрасываются)"""
+    adapter = _sparse_adapter(fields)
+    return Response(adapter.dump_json(adapter.validate_python(posts)), media_type="application/json")
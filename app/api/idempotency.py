@@ -0,0 +1,94 @@
+"""
+Поддержка заголовка Idempotency-Key
+
+Повтор запроса с тем же ключом (от того же пользователя) получает
+сохраненный ответ без повторного выполнения; тот же ключ с другими
+параметрами — 422. Сохраняются успешные ответы и ошибки клиента (4xx);
+при 5xx и непредвиденных исключениях транзакция откатывается вместе с
+ключом, и запрос можно повторить.
+
+Ключи хранятся в таблице idempotency_keys и пишутся в одной транзакции с
+бронированием/отменой, поэтому повтор, попавший в другой процесс, видит
+тот же ответ. Повтор, пришедший во время выполнения первого запроса, ждет
+его завершения. Ключи живут settings.idempotency_ttl секунд.
+"""
+import hashlib
+import json
+from typing import Any, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.idempotency import claim_idempotency_key, get_idempotency_key, save_idempotency_response
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(method: str, path: str, params: dict) -> str:
+    """Отпечаток запроса: метод, путь и параметры в каноническом виде"""
+    canonical = json.dumps(jsonable_encoder(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{method} {path} {canonical}".encode()).hexdigest()
+
+
+def run_idempotent(
+    db: Session, key: Optional[str], user_id: int, fingerprint: str, handler: Callable[[], Any]
+) -> Any:
+    """Выполнение handler с учетом Idempotency-Key и commit транзакции
+
+    handler пишет в db без commit: изменения и сохраненный ответ фиксируются
+    вместе (без ключа — просто commit после handler).
+    """
+    if key is None:
+        try:
+            result = handler()
+        except Exception:
+            db.rollback()
+            raise
+        db.commit()
+        return result
+    
+    try:
+        claimed = claim_idempotency_key(db, user_id, key, fingerprint, settings.idempotency_ttl)
+        if not claimed:
+            record = get_idempotency_key(db, user_id, key)
+            db.rollback()
+            return _replay(record, fingerprint)
+        # Точка сохранения: при ошибке клиента изменения handler откатываются, ключ остается
+        savepoint = db.begin_nested()
+        try:
+            result = handler()
+        except HTTPException as e:
+            if e.status_code >= 500:
+                raise
+            savepoint.rollback()
+            save_idempotency_response(db, user_id, key, e.status_code, {"detail": e.detail})
+            db.commit()
+            raise
+        savepoint.commit()
+        save_idempotency_response(db, user_id, key, status.HTTP_200_OK, jsonable_encoder(result))
+        db.commit()
+        return result
+    except HTTPException as e:
+        if e.status_code >= 500:
+            db.rollback()
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _replay(record, fingerprint: str) -> JSONResponse:
+    if record is not None and record.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with different parameters"
+        )
+    if record is None or record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is in progress"
+        )
+    return JSONResponse(
+        status_code=record.status_code, content=record.body, headers={REPLAY_HEADER: "true"}
+    )
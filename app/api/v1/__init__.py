@@ -7,5 +7,7 @@ API v1 роутеры
 from .auth import router as auth_router
 from .posts import router as posts_router
 from .comments import router as comments_router
+from .admin import router as admin_router
+from .health import router as health_router
 
-__all__ = ["auth_router", "posts_router", "comments_router"]
+__all__ = ["auth_router", "posts_router", "comments_router", "admin_router", "health_router"]
@@ -0,0 +1,119 @@
+"""
+Административные endpoints
+
+Доступны пользователям из settings.admin_emails.
+"""
+import io
+import re
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_db, SessionLocal
+from app.api.deps import get_current_admin
+from app.core.config import settings
+from app.core.profiler import profiler, endpoint_routes
+from app.models.user import User
+from app.services.post_import import iter_records, import_posts, export_posts
+
+router = APIRouter()
+
+FORMAT_PATTERN = "^(ndjson|csv)$"
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.post("/posts/import")
+def import_posts_endpoint(
+    file: UploadFile = File(...),
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    batch_size: int = Query(1000, ge=1, le=50000),
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Массовый импорт постов из NDJSON/CSV"""
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        return import_posts(db, iter_records(stream, format), batch_size=batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+
+@router.get("/posts/export")
+def export_posts_endpoint(
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    current_user: User = Depends(get_current_admin)
+):
+    """Потоковая выгрузка каталога постов"""
+    def generate():
+        # Собственная сессия: поток отдается уже после выхода из обработчика
+        db = SessionLocal()
+        try:
+            yield from export_posts(db, format)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=posts.{format}"}
+    )
+
+
+@router.post("/profiler/start")
+def start_profiler(
+    request: Request,
+    duration: float = Query(30.0, gt=0),
+    route: Optional[str] = Query(None, max_length=200, description="Регулярное выражение по «METHOD /path»"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Запуск семплирующего профилировщика в этом процессе на duration секунд"""
+    if route:
+        try:
+            re.compile(route)
+        except re.error as e:
+            raise HTTPException(status_code=400, detail=f"Invalid route pattern: {e}")
+    try:
+        session = profiler.start(
+            endpoint_routes(request.app.routes),
+            duration=min(duration, settings.profiler_max_duration),
+            interval=settings.profiler_interval,
+            route_filter=route,
+            output_dir=settings.profiler_output_dir
+        )
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="Profiler is already running")
+    return {"running": True, "started_at": session.started_at, "duration": session.duration}
+
+
+@router.post("/profiler/stop")
+def stop_profiler(current_user: User = Depends(get_current_admin)):
+    """Остановка профилировщика; стеки сохраняются в settings.profiler_output_dir"""
+    session = profiler.stop()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profiler has not been started")
+    return session.summary()
+
+
+@router.get("/profiler")
+def profiler_status(
+    top: int = Query(15, ge=1, le=100),
+    current_user: User = Depends(get_current_admin)
+):
+    """Состояние и сводка текущего (или последнего) запуска по эндпоинтам"""
+    if profiler.session is None:
+        return {"running": False}
+    return {"running": profiler.running, **profiler.session.summary(top)}
+
+
+@router.get("/profiler/collapsed", response_class=PlainTextResponse)
+def profiler_collapsed(
+    route: Optional[str] = Query(None, description="Только стеки эндпоинта «METHOD /path»"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Стеки в формате collapsed (flamegraph.pl, speedscope)"""
+    if profiler.session is None:
+        raise HTTPException(status_code=404, detail="Profiler has not been started")
+    return PlainTextResponse(
+        profiler.session.collapsed(route),
+        headers={"Content-Disposition": "attachment; filename=profile.collapsed"}
+    )
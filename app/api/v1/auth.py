@@ -1,11 +1,15 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
+from fastapi.security import HTTPAuthorizationCredentials
 from app.schemas.user import UserCreate, UserLogin, UserResponse, UserWithToken
+from app.schemas.auth import TokenRefresh, TokenPair, Logout
 from app.crud.user import create_user, get_user_by_email, authenticate_user
-from app.core.security import create_access_token
-from app.api.deps import get_current_user
+from app.core.security import decode_token, REFRESH_TOKEN
+from app.api.deps import get_current_user, security
 from app.models.user import User
+from app.services.auth_tokens import issue_token_pair, revoke
 
 router = APIRouter()
 
@@ -24,12 +28,9 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     # Create new user
     db_user = create_user(db=db, user=user)
     
-    # Create access token
-    access_token = create_access_token(data={"user_id": db_user.user_id})
-    
     return {
         **db_user.__dict__,
-        "token": access_token
+        **issue_token_pair(db_user.user_id)
     }
 
 
@@ -44,14 +45,47 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"user_id": user.user_id})
-    
     return {
         **user.__dict__,
-        "token": access_token
+        **issue_token_pair(user.user_id)
     }
 
 
+@router.post("/refresh", response_model=TokenPair)
+def refresh(data: TokenRefresh, db: Session = Depends(get_db)):
+    """Обмен refresh-токена на новую пару токенов (старый refresh-токен отзывается)"""
+    claims = decode_token(data.refresh_token, token_type=REFRESH_TOKEN)
+    if claims is None or not revoke(db, claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return issue_token_pair(claims.user_id)
+
+
+@router.post("/logout")
+def logout(
+    data: Optional[Logout] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """Выход: отзыв текущего access-токена и (если передан) refresh-токена"""
+    claims = decode_token(credentials.credentials)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    revoke(db, claims)
+    if data is not None and data.refresh_token:
+        refresh_claims = decode_token(data.refresh_token, token_type=REFRESH_TOKEN)
+        if refresh_claims is not None and refresh_claims.user_id == claims.user_id:
+            revoke(db, refresh_claims)
+    return {"message": "success"}
+
+
 @router.get("/me", response_model=UserResponse)
 def get_me(current_user: User = Depends(get_current_user)):
     """Получение информации о текущем пользователе"""
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.schemas.comment import Comment, CommentCreate, CommentUpdate, CommentWithUser
 from app.crud.comment import (
     get_comments_by_post, get_comment, create_comment, update_comment, delete_comment,
@@ -18,7 +18,7 @@ def get_post_comments(
     post_id: int, 
     skip: int = 0, 
     limit: int = 100, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получение комментариев к посту"""
     comments = get_comments_with_users(db, post_id, skip=skip, limit=limit)
@@ -58,7 +58,7 @@ def create_new_comment(
 
 
 @router.get("/{comment_id}", response_model=Comment)
-def get_comment_by_id(comment_id: int, db: Session = Depends(get_db)):
+def get_comment_by_id(comment_id: int, db: Session = Depends(get_read_db)):
     """Получение комментария по ID"""
     comment = get_comment(db, comment_id)
     if not comment:
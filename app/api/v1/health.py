@@ -0,0 +1,36 @@
+"""
+Проверки состояния процесса
+
+live — процесс отвечает; ready — пул соединений прогрет и можно принимать трафик;
+metrics — счетчики процесса и статистика фоновых задач.
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.database import pool_ready, replica_router
+from app.core.scheduler import scheduler
+from app.core.single_flight import single_flights
+
+router = APIRouter()
+
+
+@router.get("/live")
+def liveness():
+    """Процесс запущен"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness():
+    """Готовность к трафику: 503, пока пул соединений не прогрет"""
+    if not pool_ready():
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "replicas": replica_router.status()}
+
+
+@router.get("/metrics")
+def metrics():
+    """Метрики процесса: объединение одинаковых запросов, фоновые задачи"""
+    return {
+        "single_flight": {name: flight.stats() for name, flight in single_flights.items()},
+        "jobs": scheduler.metrics(),
+    }
@@ -1,101 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Header
 from sqlalchemy.orm import Session
-from typing import List
+from typing import FrozenSet, List, Optional, Tuple
+from datetime import datetime
+import base64
 import os
 import shutil
-from app.database import get_db
-from app.schemas.post import PostResponse, TicketBooking, TicketBookingResponse
+from app.database import get_db, get_read_db
+from app.core.config import settings
+from app.schemas.post import (
+    PostResponse, TicketBooking, TicketBookingResponse, PostSearchPage, PostFilterPage,
+    TrendingPost, TrendingTag, ArchivedTicket
+)
 from app.crud.post import (
     get_posts, get_post, increment_post_views, get_posts_by_tag, 
-    get_last_tags, book_ticket, get_user_tickets, cancel_ticket,
-    get_tickets_availability, get_posts_with_availability
+    book_ticket, get_user_tickets, cancel_ticket,
+    get_tickets_availability, get_posts_with_availability, get_user_tickets_with_availability,
+    get_post_detail, search_posts, filter_posts, mark_booked_by_user,
+    get_posts_by_tag_with_availability, get_user_archived_tickets, is_past_event,
+    invalidate_user_bookings
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_id_optional
+from app.api.idempotency import request_fingerprint, run_idempotent
+from app.api.fields import post_fields, sparse_response
 from app.models.user import User
+from app.services.view_counter import view_counter
+from app.services.trending import trending_recorder, trending_ranker
+from app.middleware.compression import precompress_file
+from app.services.catalog import get_posts_page, get_availability, popular_tags
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[PostResponse])
-def get_all_posts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Получение всех постов с информацией о доступности билетов"""
-    posts = get_posts_with_availability(db, skip=skip, limit=limit)
-    return posts
+def get_all_posts(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[FrozenSet[str]] = Depends(post_fields),
+    user_id: Optional[int] = Depends(get_current_user_id_optional),
+    read_db: Session = Depends(get_read_db),
+    db: Session = Depends(get_db)
+):
+    """Получение всех постов с информацией о доступности билетов
+
+    fields / view=summary — только выбранные поля (см. app/api/fields.py).
+    """
+    # Список — с реплики; отметки «забронировано мной» — с primary (сразу после бронирования)
+    posts = get_posts_page(read_db, skip=skip, limit=limit, fields=fields)
+    return _listing_response(db, posts, user_id, fields)
 
 
 @router.get("/with-availability/")
-def get_posts_with_availability_info(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_posts_with_availability_info(
+    skip: int = 0,
+    limit: int = 100,
+    user_id: Optional[int] = Depends(get_current_user_id_optional),
+    read_db: Session = Depends(get_read_db),
+    db: Session = Depends(get_db)
+):
     """Получение всех постов с информацией о доступности билетов"""
-    posts = get_posts_with_availability(db, skip=skip, limit=limit)
-    return posts
+    posts = get_posts_page(read_db, skip=skip, limit=limit)
+    return mark_booked_by_user(db, posts, user_id)
+
+
+def _listing_response(db: Session, posts: List[dict], user_id: Optional[int], fields: Optional[FrozenSet[str]]):
+    """Список постов с отметками пользователя: полный или только с полями fields"""
+    if fields is None:
+        return mark_booked_by_user(db, posts, user_id)
+    if "is_booked_by_user" in fields:
+        mark_booked_by_user(db, posts, user_id)
+    return sparse_response(posts, fields)
+
+
+def _encode_search_cursor(rank: float, post_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}:{post_id}".encode()).decode()
+
+
+def _decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(rank), int(post_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/search/", response_model=PostSearchPage)
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Полнотекстовый поиск по названию и описанию постов"""
+    after_rank, after_id = _decode_search_cursor(cursor) if cursor else (None, None)
+    items = search_posts(db, q, limit=limit, after_rank=after_rank, after_id=after_id)
+    
+    next_cursor = None
+    if len(items) == limit:
+        last = items[-1]
+        next_cursor = _encode_search_cursor(last["rank"], last["post_id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/filter/", response_model=PostFilterPage)
+def filter_posts_endpoint(
+    tags: Optional[List[str]] = Query(None),
+    match: str = Query("any", pattern="^(any|all)$"),
+    only_available: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    sort: str = Query("recent", pattern="^(recent|popular)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    user_id: Optional[int] = Depends(get_current_user_id_optional),
+    read_db: Session = Depends(get_read_db),
+    db: Session = Depends(get_db)
+):
+    """Фильтрация постов по тегам, доступности и дате с фасетами по тегам"""
+    page = filter_posts(
+        read_db,
+        tags=tags,
+        match_all=match == "all",
+        only_available=only_available,
+        created_from=created_from,
+        created_to=created_to,
+        sort=sort,
+        skip=skip,
+        limit=limit
+    )
+    mark_booked_by_user(db, page["items"], user_id)
+    return page
+
+
+@router.get("/trending/", response_model=List[TrendingPost])
+def get_trending_posts(limit: int = Query(20, ge=1, le=100)):
+    """Популярные сейчас события (из предрассчитанного рейтинга в памяти)"""
+    return trending_ranker.top_posts[:limit]
+
+
+@router.get("/trending/tags/", response_model=List[TrendingTag])
+def get_trending_tags(limit: int = Query(20, ge=1, le=100)):
+    """Популярные сейчас теги"""
+    return trending_ranker.top_tags[:limit]
 
 
 @router.get("/{post_id}", response_model=PostResponse)
-def get_one_post(post_id: int, db: Session = Depends(get_db)):
+def get_one_post(
+    post_id: int,
+    user_id: Optional[int] = Depends(get_current_user_id_optional),
+    db: Session = Depends(get_db)
+):
     """Получение конкретного поста с информацией о доступности билетов"""
-    post = increment_post_views(db, post_id)
+    # Просмотр и доступность — одним запросом; в отложенном режиме просмотр копится в памяти
+    deferred = settings.deferred_view_counts
+    post = get_post_detail(db, post_id, increment_views=not deferred)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
-    # Получаем информацию о доступности билетов
-    availability = get_tickets_availability(db, post_id)
-    
-    # Создаем объект с полной информацией
-    post_data = {
-        "post_id": post.post_id,
-        "title": post.title,
-        "text": post.text,
-        "tags": post.tags,
-        "views_count": post.views_count,
-        "image_url": post.image_url,
-        "tickets_limit": post.tickets_limit,
-        "created_at": post.created_at,
-        "tickets_available": availability["available"],
-        "tickets_booked": availability["booked"],
-        "is_available": availability["is_available"]
-    }
+    if deferred:
+        post["views_count"] = (post["views_count"] or 0) + view_counter.add(post_id)
+    trending_recorder.record_view(post_id)
     
-    return post_data
+    return mark_booked_by_user(db, [post], user_id)[0]
 
 
 @router.get("/{post_id}/availability/")
 def get_post_availability(post_id: int, db: Session = Depends(get_db)):
     """Получение информации о доступности билетов для конкретного поста"""
-    availability = get_tickets_availability(db, post_id)
+    availability = get_availability(db, post_id)
     if availability["limit"] == 0:
         raise HTTPException(status_code=404, detail="Post not found")
     return availability
 
 
 @router.get("/tags/{tag_name}", response_model=List[PostResponse])
-def get_posts_by_tag_name(tag_name: str, db: Session = Depends(get_db)):
+def get_posts_by_tag_name(
+    tag_name: str,
+    fields: Optional[FrozenSet[str]] = Depends(post_fields),
+    user_id: Optional[int] = Depends(get_current_user_id_optional),
+    read_db: Session = Depends(get_read_db),
+    db: Session = Depends(get_db)
+):
     """Получение постов по тегу с информацией о доступности билетов"""
     try:
         # Декодируем URL-encoded символы
         import urllib.parse
         decoded_tag = urllib.parse.unquote(tag_name)
-        posts = get_posts_by_tag(db, decoded_tag)
-        
-        # Добавляем информацию о доступности для каждого поста
-        posts_with_availability = []
-        for post in posts:
-            availability = get_tickets_availability(db, post.post_id)
-            post_data = {
-                "post_id": post.post_id,
-                "title": post.title,
-                "text": post.text,
-                "tags": post.tags,
-                "views_count": post.views_count,
-                "image_url": post.image_url,
-                "tickets_limit": post.tickets_limit,
-                "created_at": post.created_at,
-                "tickets_available": availability["available"],
-                "tickets_booked": availability["booked"],
-                "is_available": availability["is_available"]
-            }
-            posts_with_availability.append(post_data)
-        
-        return posts_with_availability
+        posts = get_posts_by_tag_with_availability(read_db, decoded_tag, fields=fields)
+        return _listing_response(db, posts, user_id, fields)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing tag: {str(e)}")
 
@@ -104,79 +195,92 @@ def get_posts_by_tag_name(tag_name: str, db: Session = Depends(get_db)):
 def book_ticket_endpoint(
     booking: TicketBooking,
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200),
     db: Session = Depends(get_db)
 ):
-    """Бронирование билета с проверкой доступности"""
-    # Verify post exists
-    post = get_post(db, booking.post_id)
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Check availability first
-    availability = get_tickets_availability(db, booking.post_id)
-    if not availability["is_available"]:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"No tickets available. {availability['booked']}/{availability['limit']} tickets booked"
-        )
-    
-    # Book the ticket
-    success = book_ticket(db, booking.post_id, current_user.user_id)
-    if not success:
-        raise HTTPException(status_code=400, detail="Ticket already booked by this user")
+    """Бронирование билета с проверкой доступности
+
+    Повтор с тем же Idempotency-Key возвращает сохраненный ответ.
+    """
+    def book():
+        # Verify post exists
+        post = get_post(db, booking.post_id)
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if is_past_event(post.event_at):
+            raise HTTPException(status_code=400, detail="Event has already taken place")
+        
+        # Check availability first
+        availability = get_tickets_availability(db, booking.post_id)
+        if not availability["is_available"]:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"No tickets available. {availability['booked']}/{availability['limit']} tickets booked"
+            )
+        
+        # Book the ticket
+        success = book_ticket(db, booking.post_id, current_user.user_id, commit=False)
+        if not success:
+            raise HTTPException(status_code=400, detail="Ticket already booked by this user")
+        
+        return TicketBookingResponse(post_id=booking.post_id, user_id=current_user.user_id)
     
-    return TicketBookingResponse(post_id=booking.post_id, user_id=current_user.user_id)
+    fingerprint = request_fingerprint("POST", "/posts/", booking.model_dump())
+    result = run_idempotent(db, idempotency_key, current_user.user_id, fingerprint, book)
+    invalidate_user_bookings(current_user.user_id)
+    if isinstance(result, TicketBookingResponse):
+        trending_recorder.record_booking(booking.post_id)
+    return result
 
 
 @router.delete("/")
 def cancel_ticket_endpoint(
     post_id: int,
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200),
     db: Session = Depends(get_db)
 ):
-    """Отмена бронирования билета"""
-    success = cancel_ticket(db, post_id, current_user.user_id)
-    if not success:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    """Отмена бронирования билета
+
+    Повтор с тем же Idempotency-Key возвращает сохраненный ответ.
+    """
+    def cancel():
+        success = cancel_ticket(db, post_id, current_user.user_id, commit=False)
+        if not success:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        
+        return {"message": "success"}
     
-    return {"message": "success"}
+    fingerprint = request_fingerprint("DELETE", "/posts/", {"post_id": post_id})
+    result = run_idempotent(db, idempotency_key, current_user.user_id, fingerprint, cancel)
+    invalidate_user_bookings(current_user.user_id)
+    return result
 
 
 @router.get("/my-tickets/", response_model=List[PostResponse])
 def get_my_tickets(
+    fields: Optional[FrozenSet[str]] = Depends(post_fields),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Получение билетов текущего пользователя с информацией о доступности"""
-    tickets = get_user_tickets(db, current_user.user_id)
-    
-    # Добавляем информацию о доступности для каждого билета
-    tickets_with_availability = []
-    for ticket in tickets:
-        availability = get_tickets_availability(db, ticket.post_id)
-        ticket_data = {
-            "post_id": ticket.post_id,
-            "title": ticket.title,
-            "text": ticket.text,
-            "tags": ticket.tags,
-            "views_count": ticket.views_count,
-            "image_url": ticket.image_url,
-            "tickets_limit": ticket.tickets_limit,
-            "created_at": ticket.created_at,
-            "tickets_available": availability["available"],
-            "tickets_booked": availability["booked"],
-            "is_available": availability["is_available"]
-        }
-        tickets_with_availability.append(ticket_data)
-    
-    return tickets_with_availability
+    tickets = get_user_tickets_with_availability(db, current_user.user_id, fields=fields)
+    return tickets if fields is None else sparse_response(tickets, fields)
+
+
+@router.get("/my-tickets/archive/", response_model=List[ArchivedTicket])
+def get_my_archived_tickets(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Билеты текущего пользователя на завершившиеся события"""
+    return get_user_archived_tickets(db, current_user.user_id)
 
 
 @router.get("/tags/", response_model=List[str])
-def get_tags(db: Session = Depends(get_db)):
+def get_tags(db: Session = Depends(get_read_db)):
     """Получение популярных тегов"""
-    tags = get_last_tags(db)
-    return tags
+    return popular_tags.get(db)
 
 
 @router.post("/upload")
@@ -189,5 +293,7 @@ def upload_file(file: UploadFile = File(...)):
     file_path = f"uploads/{file.filename}"
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
+    # Сжатые копии для текстовых форматов (svg, json, ...) отдаются из /uploads без сжатия на лету
+    precompress_file(file_path)
     
     return {"url": f"/uploads/{file.filename}"}
@@ -0,0 +1,92 @@
+"""
+Кэш в памяти процесса
+
+Потокобезопасный LRU-кэш с ограничением размера и временем жизни записей.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш с TTL"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._get(key, default, time.monotonic())
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Найденные в кэше значения (отсутствующие ключи пропускаются)"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._get(key, _MISSING, now)
+                if value is not _MISSING:
+                    found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._set(key, value, time.monotonic() + (self.ttl if ttl is None else ttl))
+
+    def set_many(self, items: Dict[Hashable, Any], ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            for key, value in items.items():
+                self._set(key, value, expires)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """Атомарная запись, только если ключа нет; True — значение записано"""
+        now = time.monotonic()
+        with self._lock:
+            if self._get(key, _MISSING, now) is not _MISSING:
+                return False
+            self._set(key, value, now + (self.ttl if ttl is None else ttl))
+            return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def sweep(self) -> int:
+        """Удаление просроченных записей; возвращает число удаленных"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._data.items() if expires <= now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: Hashable, default: Any, now: float) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires <= now:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key: Hashable, value: Any, expires: float) -> None:
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -0,0 +1,236 @@
+"""
+Семплирующий профилировщик по запросу
+
+Включается на заданное время из /admin/profiler: фоновый поток с интервалом
+settings.profiler_interval снимает стеки всех потоков процесса
+(sys._current_frames) и относит каждый стек к эндпоинту — по кадру функции
+эндпоинта (синхронные обработчики в пуле потоков) или по кадру обработчика
+FastAPI (асинхронная часть запроса: валидация, jsonable_encoder). Стеки вне
+запросов (простаивающий event loop, фоновые задачи) не учитываются. Время
+стены, поэтому ожидание БД и bcrypt видны так же, как работа Python.
+
+Результат — стеки в формате collapsed («кадр;кадр;кадр число»), который
+принимают flamegraph.pl и speedscope. Пока профилировщик выключен, он не
+запущен вовсе и ничего не стоит.
+"""
+import logging
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from types import CodeType
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi.routing import APIRoute, get_request_handler
+
+logger = logging.getLogger(__name__)
+
+# Код обработчика запроса FastAPI (замыкание app внутри get_request_handler)
+_HANDLER_CODES = frozenset(
+    const for const in get_request_handler.__code__.co_consts
+    if isinstance(const, CodeType) and const.co_name == "app"
+)
+
+
+def endpoint_routes(routes: Iterable) -> Dict[CodeType, str]:
+    """Код функции эндпоинта -> «METHOD /path» для маршрутов FastAPI"""
+    labels = {}
+    for route in routes:
+        if isinstance(route, APIRoute):
+            labels[route.endpoint.__code__] = f"{','.join(sorted(route.methods))} {route.path}"
+    return labels
+
+
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"] + os.sep
+
+
+def _short_path(filename: str) -> str:
+    marker = f"site-packages{os.sep}"
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    if filename.startswith(_STDLIB_DIR):
+        return filename[len(_STDLIB_DIR):]
+    try:
+        relative = os.path.relpath(filename)
+    except ValueError:
+        return filename
+    return filename if relative.startswith("..") else relative
+
+
+class ProfileSession:
+    """Стеки одного запуска профилировщика, сгруппированные по эндпоинтам"""
+
+    def __init__(self, interval: float, duration: float, route_filter: Optional[str]):
+        self.interval = interval
+        self.duration = duration
+        self.route_filter = route_filter
+        self.started_at = datetime.now(timezone.utc)
+        self.stopped_at: Optional[datetime] = None
+        self.ticks = 0
+        self.stacks: Dict[str, Counter] = defaultdict(Counter)
+        self.files: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, label: str, stack: Tuple[str, ...]) -> None:
+        with self._lock:
+            self.stacks[label][stack] += 1
+
+    def _snapshot(self) -> Dict[str, Counter]:
+        # Копия: профилировщик может продолжать писать во время чтения
+        with self._lock:
+            return {label: Counter(stacks) for label, stacks in self.stacks.items()}
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Стеки в формате collapsed; корневой кадр — эндпоинт"""
+        lines = []
+        for label, stacks in sorted(self._snapshot().items()):
+            if route is not None and label != route:
+                continue
+            for stack, count in stacks.most_common():
+                lines.append(f"{';'.join((label, *stack))} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self, top: int = 15) -> dict:
+        """Сэмплы по эндпоинтам и самые затратные функции (собственное и полное время)"""
+        endpoints = {}
+        for label, stacks in self._snapshot().items():
+            samples = sum(stacks.values())
+            own: Counter = Counter()
+            total: Counter = Counter()
+            for stack, count in stacks.items():
+                own[stack[-1]] += count
+                for frame in set(stack):
+                    total[frame] += count
+            endpoints[label] = {
+                "samples": samples,
+                "seconds": round(samples * self.interval, 3),
+                "self": [{"frame": frame, "samples": count} for frame, count in own.most_common(top)],
+                "total": [{"frame": frame, "samples": count} for frame, count in total.most_common(top)],
+            }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "stopped_at": self.stopped_at.isoformat() if self.stopped_at else None,
+            "interval": self.interval,
+            "route_filter": self.route_filter,
+            "ticks": self.ticks,
+            "files": self.files,
+            "endpoints": dict(sorted(endpoints.items(), key=lambda item: -item[1]["samples"])),
+        }
+
+
+class SamplingProfiler:
+    """Фоновый поток, семплирующий стеки потоков процесса"""
+
+    def __init__(self, max_depth: int = 128):
+        self.max_depth = max_depth
+        self.session: Optional[ProfileSession] = None
+        self._routes: Dict[CodeType, str] = {}
+        self._route_pattern: Optional[re.Pattern] = None
+        self._frame_labels: Dict[CodeType, str] = {}
+        self._output_dir: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        routes: Dict[CodeType, str],
+        duration: float,
+        interval: float,
+        route_filter: Optional[str] = None,
+        output_dir: Optional[str] = None
+    ) -> ProfileSession:
+        """Запуск на duration секунд; route_filter — регулярное выражение по «METHOD /path»"""
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError("Profiler is already running")
+            self._routes = routes
+            self._route_pattern = re.compile(route_filter) if route_filter else None
+            self._output_dir = output_dir
+            self.session = ProfileSession(interval, duration, route_filter)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return self.session
+
+    def stop(self) -> Optional[ProfileSession]:
+        """Остановка (если запущен) и запись результата в output_dir"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            session = self.session
+            if thread is None:
+                return session
+            self._stop.set()
+        if thread is not threading.current_thread():
+            thread.join()
+        session.stopped_at = datetime.now(timezone.utc)
+        if self._output_dir:
+            try:
+                session.files = self._save(session)
+            except OSError as e:
+                logger.warning("Failed to save profile: %s", e)
+        return session
+
+    def _save(self, session: ProfileSession) -> List[str]:
+        os.makedirs(self._output_dir, exist_ok=True)
+        name = f"{session.started_at:%Y%m%d-%H%M%S}-{os.getpid()}.collapsed"
+        path = os.path.join(self._output_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(session.collapsed())
+        return [path]
+
+    def _loop(self) -> None:
+        session = self.session
+        deadline = time.monotonic() + session.duration
+        while not self._stop.wait(session.interval):
+            self._sample(session)
+            if time.monotonic() >= deadline:
+                self.stop()
+                break
+
+    def _sample(self, session: ProfileSession) -> None:
+        own_thread = threading.get_ident()
+        session.ticks += 1
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            label, codes = self._attribute(frame)
+            if label is None:
+                continue
+            if self._route_pattern is not None and not self._route_pattern.search(label):
+                continue
+            session.add(label, tuple(self._frame_label(code) for code in reversed(codes)))
+
+    def _attribute(self, frame) -> Tuple[Optional[str], List[CodeType]]:
+        """Эндпоинт стека и кадры от листа до кадра эндпоинта (корень отсекается)"""
+        codes = []
+        while frame is not None and len(codes) < self.max_depth:
+            code = frame.f_code
+            codes.append(code)
+            label = self._routes.get(code)
+            if label is not None:
+                return label, codes
+            if code in _HANDLER_CODES:
+                dependant = frame.f_locals.get("dependant")
+                call = getattr(dependant, "call", None)
+                label = self._routes.get(getattr(call, "__code__", None))
+                return label, codes
+            frame = frame.f_back
+        return None, codes
+
+    def _frame_label(self, code: CodeType) -> str:
+        label = self._frame_labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._frame_labels[code] = label
+        return label
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,83 @@
+"""
+Множество отозванных токенов в памяти процесса
+
+Фильтр Блума отсекает подавляющее большинство проверок (токен не отозван)
+одним проходом по битам; положительный ответ подтверждается точным
+множеством. Записи живут до истечения токена.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+
+class BloomFilter:
+    """Фильтр Блума на bytearray с двойным хешированием"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationSet:
+    """Отозванные jti с временем истечения (unix time)"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.error_rate = error_rate
+        self._expires: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        expires = self._expires.get(jti)
+        return expires is not None and expires > time.time()
+
+    def add(self, jti: str, expires: float) -> None:
+        self.update([(jti, expires)])
+
+    def update(self, entries: Iterable[Tuple[str, float]]) -> None:
+        with self._lock:
+            for jti, expires in entries:
+                self._expires[jti] = expires
+                self._bloom.add(jti)
+            if len(self._expires) > self._bloom.capacity:
+                self._rebuild(len(self._expires) * 2)
+
+    def prune(self) -> int:
+        """Удаление истекших записей (фильтр перестраивается); возвращает число удаленных"""
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, expires in self._expires.items() if expires <= now]
+            for jti in expired:
+                del self._expires[jti]
+            if expired:
+                self._rebuild(self._bloom.capacity)
+        return len(expired)
+
+    def _rebuild(self, capacity: int) -> None:
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in self._expires:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def __len__(self) -> int:
+        return len(self._expires)
@@ -0,0 +1,376 @@
+"""
+Планировщик фоновых задач процесса
+
+Задачи запускаются из lifespan приложения: по интервалу или по расписанию
+в стиле cron (UTC). Сама функция задачи синхронная и выполняется в отдельном
+пуле потоков, не занимая потоки обработки запросов. Для каждой задачи
+задаются ограничение параллельных запусков и случайный сдвиг (jitter), чтобы
+процессы не ходили в БД одновременно. Задачи с leader=True выполняет только
+один процесс на все инстансы — тот, что держит advisory-блокировку PostgreSQL
+с именем задачи (блокировка живет, пока открыто соединение процесса).
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Старшие 32 бита ключа advisory-блокировки (младшие — crc32 имени задачи)
+LEADER_LOCK_NAMESPACE = 7_315_002
+
+
+class IntervalTrigger:
+    """Запуск каждые seconds секунд"""
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in field.split(","):
+        expr, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            start, end = (int(value) for value in expr.split("-", 1))
+        else:
+            start = end = int(expr)
+            if step != 1:
+                end = high
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronTrigger:
+    """Расписание из пяти полей cron: минута, час, день месяца, месяц, день недели
+
+    Поддерживаются *, списки, диапазоны и шаг (*/15, 0-30/10). День недели:
+    0–6, воскресенье — 0 (7 тоже воскресенье). Как в cron, если ограничены и
+    день месяца, и день недели, достаточно совпадения любого из них.
+    """
+
+    # Сколько дней вперед искать следующий запуск (например, 29 февраля)
+    MAX_LOOKAHEAD_DAYS = 366 * 5
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        weekdays = _parse_cron_field(fields[4], 0, 7)
+        # cron: 0 — воскресенье; datetime.weekday(): 0 — понедельник
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_fire(self, after: datetime) -> datetime:
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=self.MAX_LOOKAHEAD_DAYS)
+        while moment <= limit:
+            if moment.month not in self.months or not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def __str__(self) -> str:
+        return f"cron {self.expression}"
+
+
+class LeaderLock:
+    """Advisory-блокировки лидерства на отдельном соединении процесса
+
+    Блокировка берется на уровне сессии и не снимается после выполнения задачи:
+    процесс остается лидером, пока жив (или до release_all). Если соединение
+    потеряно, PostgreSQL освобождает блокировки, и лидером становится другой
+    процесс; текущий при следующей попытке переподключается и пробует снова.
+    """
+
+    def __init__(self, engine_factory: Optional[Callable] = None):
+        self.engine_factory = engine_factory
+        self._connection: Optional[Connection] = None
+        self._held: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def lock_key(name: str) -> int:
+        return (LEADER_LOCK_NAMESPACE << 32) | zlib.crc32(name.encode())
+
+    def holds(self, name: str) -> bool:
+        return name in self._held
+
+    def acquire(self, name: str) -> bool:
+        """True, если процесс лидер для задачи name (блокировка уже удерживается или взята)"""
+        with self._lock:
+            try:
+                connection = self._connect()
+                if name in self._held:
+                    connection.execute(text("SELECT 1"))
+                    return True
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key(name)}
+                ).scalar()
+            except Exception as e:
+                logger.warning("Leader lock connection failed: %s", e)
+                self._reset()
+                return False
+            if acquired:
+                logger.info("Became leader for job %s", name)
+                self._held.add(name)
+            return bool(acquired)
+
+    def release_all(self) -> None:
+        """Закрытие соединения: все блокировки лидерства освобождаются"""
+        with self._lock:
+            self._reset()
+
+    def _connect(self) -> Connection:
+        if self._connection is None:
+            if self.engine_factory is None:
+                from app.database import get_engine
+                self.engine_factory = get_engine
+            self._connection = self.engine_factory().connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+        return self._connection
+
+    def _reset(self) -> None:
+        if self._held:
+            logger.info("Leadership released for jobs: %s", ", ".join(sorted(self._held)))
+        self._held.clear()
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+class JobStats:
+    """Счетчики и длительности запусков задачи"""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.skipped_busy = 0  # предыдущие запуски еще выполняются
+        self.skipped_not_leader = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_duration: Optional[float] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, started_at: datetime, duration: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.runs += 1
+            self.total_duration += duration
+            self.max_duration = max(self.max_duration, duration)
+            self.last_duration = duration
+            self.last_started_at = started_at
+            if error is not None:
+                self.failures += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def skip(self, not_leader: bool = False) -> None:
+        with self._lock:
+            if not_leader:
+                self.skipped_not_leader += 1
+            else:
+                self.skipped_busy += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "failures": self.failures,
+                "skipped_busy": self.skipped_busy,
+                "skipped_not_leader": self.skipped_not_leader,
+                "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+                "last_duration": round(self.last_duration, 4) if self.last_duration is not None else None,
+                "avg_duration": round(self.total_duration / self.runs, 4) if self.runs else None,
+                "max_duration": round(self.max_duration, 4),
+                "last_error": self.last_error,
+            }
+
+
+class Job:
+    """Задача планировщика"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        trigger,
+        max_concurrency: int = 1,
+        jitter: float = 0.0,
+        leader: bool = False,
+        run_on_shutdown: bool = False
+    ):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.leader = leader
+        self.run_on_shutdown = run_on_shutdown
+        self.running = 0
+        self.next_run_at: Optional[datetime] = None
+        self.stats = JobStats()
+
+
+class Scheduler:
+    """Асинхронный планировщик: цикл asyncio на задачу, выполнение в пуле потоков"""
+
+    def __init__(self, workers: int = 4, leader_lock: Optional[LeaderLock] = None):
+        self.workers = workers
+        self.leader_lock = leader_lock or LeaderLock()
+        self.jobs: Dict[str, Job] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loops: List[asyncio.Task] = []
+        self._running: Set[asyncio.Task] = set()
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], object],
+        interval: Optional[float] = None,
+        cron: Optional[str] = None,
+        max_concurrency: int = 1,
+        jitter: float = 0.0,
+        leader: bool = False,
+        run_on_shutdown: bool = False
+    ) -> Job:
+        """Регистрация задачи по интервалу (секунды) или по cron-выражению
+
+        jitter — верхняя граница случайной задержки каждого запуска в секундах;
+        leader — выполнять только в процессе-лидере; run_on_shutdown — вызвать
+        еще раз при остановке (например, чтобы сбросить буферы в БД).
+        """
+        if (interval is None) == (cron is None):
+            raise ValueError("Exactly one of interval or cron is required")
+        trigger = IntervalTrigger(interval) if interval is not None else CronTrigger(cron)
+        job = Job(name, func, trigger, max_concurrency, jitter, leader, run_on_shutdown)
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        """Запуск циклов задач в текущем event loop"""
+        if self._loops:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+        for job in self.jobs.values():
+            self._loops.append(asyncio.create_task(self._loop(job), name=f"job-{job.name}"))
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Остановка: ожидание текущих запусков, финальные вызовы run_on_shutdown"""
+        if self._executor is None:
+            return
+        for task in self._loops:
+            task.cancel()
+        await asyncio.gather(*self._loops, return_exceptions=True)
+        self._loops = []
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+
+        loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            if job.run_on_shutdown:
+                await loop.run_in_executor(self._executor, self._call, job)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+        self.leader_lock.release_all()
+
+    def metrics(self) -> Dict[str, dict]:
+        """Расписание, состояние и длительности запусков по задачам"""
+        return {
+            name: {
+                "schedule": str(job.trigger),
+                "leader_only": job.leader,
+                "is_leader": self.leader_lock.holds(name) if job.leader else None,
+                "running": job.running,
+                "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
+                **job.stats.as_dict(),
+            }
+            for name, job in self.jobs.items()
+        }
+
+    async def _loop(self, job: Job) -> None:
+        fire_at: Optional[datetime] = None
+        while True:
+            now = datetime.now(timezone.utc)
+            fire_at = job.trigger.next_fire(max(now, fire_at) if fire_at else now)
+            delay = (fire_at - now).total_seconds()
+            if job.jitter:
+                delay += random.uniform(0, job.jitter)
+            job.next_run_at = now + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+
+            if job.running >= job.max_concurrency:
+                job.stats.skip()
+                logger.warning("Job %s skipped: %s run(s) still in progress", job.name, job.running)
+                continue
+            job.running += 1
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: Job) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._call, job)
+        finally:
+            job.running -= 1
+
+    def _call(self, job: Job) -> None:
+        """Выполнение задачи в потоке пула (ошибки логируются и учитываются в статистике)"""
+        if job.leader and not self.leader_lock.acquire(job.name):
+            job.stats.skip(not_leader=True)
+            return
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = e
+            logger.exception("Job %s failed", job.name)
+        job.stats.record(started_at, time.perf_counter() - started, error)
+
+
+scheduler = Scheduler(workers=settings.scheduler_workers)
@@ -1,11 +1,35 @@
+import hashlib
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.revocation import RevocationSet
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+
+class TokenClaims(NamedTuple):
+    user_id: int
+    jti: Optional[str]  # у токенов, выданных до появления отзыва, jti нет
+    type: str
+    exp: float
+
+
+# Проверенные токены по SHA-256 всего токена до их истечения: ключ по одной
+# подписи принял бы токен с подмененными заголовком или payload
+verified_tokens = TTLCache(
+    maxsize=settings.token_cache_size, ttl=settings.refresh_token_expire_days * 86400
+)
+# Отозванные jti, синхронизируются из revoked_tokens (app/services/auth_tokens.py)
+revoked_tokens = RevocationSet(settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Проверка пароля"""
@@ -24,18 +48,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode.update({"exp": expire})
+    to_encode.setdefault("type", ACCESS_TOKEN)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[int]:
-    """Проверка JWT токена"""
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: int = payload.get("user_id")
-        if user_id is None:
+def create_refresh_token(user_id: int) -> str:
+    """Создание долгоживущего refresh-токена"""
+    return create_access_token(
+        {"user_id": user_id, "type": REFRESH_TOKEN},
+        expires_delta=timedelta(days=settings.refresh_token_expire_days)
+    )
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> Optional[TokenClaims]:
+    """Проверка JWT токена с кэшем проверенных токенов и списком отзыва"""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    claims = verified_tokens.get(cache_key)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        except JWTError:
+            return None
+        user_id = payload.get("user_id")
+        if user_id is None or payload.get("exp") is None:
             return None
-        return user_id
-    except JWTError:
+        claims = TokenClaims(user_id, payload.get("jti"), payload.get("type", ACCESS_TOKEN), float(payload["exp"]))
+        ttl = claims.exp - time.time()
+        if ttl <= 0:
+            return None
+        verified_tokens.set(cache_key, claims, ttl=ttl)
+    
+    if claims.type != token_type:
+        return None
+    if claims.jti is not None and claims.jti in revoked_tokens:
         return None
+    return claims
+
+
+def verify_token(token: str) -> Optional[int]:
+    """Проверка JWT токена"""
+    claims = decode_token(token)
+    return claims.user_id if claims else None
@@ -0,0 +1,95 @@
+"""
+Объединение одинаковых параллельных вычислений (single-flight)
+
+Первый вызов с ключом выполняет функцию, одновременные вызовы с тем же
+ключом ждут и получают его результат. Результат дополнительно переиспользуется
+в течение короткого окна. Объекты результата общие для всех получателей —
+изменять их нельзя (копирует вызывающий).
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Реестр для метрик (/health/metrics)
+single_flights: Dict[str, "SingleFlight"] = {}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Группа объединяемых вычислений"""
+
+    def __init__(self, name: str, window: float = 0.0, max_results: int = 1024):
+        self.name = name
+        self.window = window
+        self.max_results = max_results
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.executions = 0
+        self.shared = 0
+        self.window_hits = 0
+        single_flights[name] = self
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > now:
+                self.window_hits += 1
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.window > 0:
+                    self._store(key, call.result, time.monotonic())
+            call.done.set()
+        return call.result
+
+    def _store(self, key: Hashable, result: Any, now: float) -> None:
+        if len(self._results) >= self.max_results:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            if len(self._results) >= self.max_results:
+                self._results.clear()
+        self._results[key] = (now + self.window, result)
+
+    def stats(self) -> dict:
+        """Счетчики и доля запросов, обслуженных без собственного вычисления"""
+        with self._lock:
+            requests, executions = self.requests, self.executions
+            return {
+                "requests": requests,
+                "executions": executions,
+                "shared": self.shared,
+                "window_hits": self.window_hits,
+                "in_flight": len(self._calls),
+                "coalescing_ratio": round(1 - executions / requests, 4) if requests else 0.0,
+            }
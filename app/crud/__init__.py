@@ -8,18 +8,34 @@ from .user import get_user, get_user_by_email, create_user, authenticate_user
 from .post import (
     get_posts, get_post, create_post, increment_post_views,
     get_posts_by_tag, get_last_tags, book_ticket, get_user_tickets, cancel_ticket,
-    get_tickets_availability, get_posts_with_availability
+    get_tickets_availability, get_posts_with_availability, get_user_tickets_with_availability,
+    get_post_detail, search_posts, filter_posts,
+    get_user_booked_post_ids, invalidate_user_bookings, mark_booked_by_user,
+    get_posts_by_tag_with_availability, is_past_event, archive_past_bookings, get_user_archived_tickets
 )
 from .comment import (
     get_comments_by_post, get_comment, create_comment, update_comment, delete_comment,
     get_comments_with_users
 )
+from .token import revoke_token, get_revocations_since, delete_expired_revocations
+from .idempotency import (
+    claim_idempotency_key, get_idempotency_key, save_idempotency_response, delete_expired_idempotency_keys
+)
+from .notification import (
+    enqueue_notification, claim_pending_notifications, mark_notification_sent, mark_notification_failed
+)
 
 __all__ = [
     "get_user", "get_user_by_email", "create_user", "authenticate_user",
     "get_posts", "get_post", "create_post", "increment_post_views",
     "get_posts_by_tag", "get_last_tags", "book_ticket", "get_user_tickets", "cancel_ticket",
-    "get_tickets_availability", "get_posts_with_availability",
+    "get_tickets_availability", "get_posts_with_availability", "get_user_tickets_with_availability",
+    "get_post_detail", "search_posts", "filter_posts",
+    "get_user_booked_post_ids", "invalidate_user_bookings", "mark_booked_by_user",
+    "get_posts_by_tag_with_availability", "is_past_event", "archive_past_bookings", "get_user_archived_tickets",
     "get_comments_by_post", "get_comment", "create_comment", "update_comment", "delete_comment",
-    "get_comments_with_users"
+    "get_comments_with_users",
+    "revoke_token", "get_revocations_since", "delete_expired_revocations",
+    "claim_idempotency_key", "get_idempotency_key", "save_idempotency_response", "delete_expired_idempotency_keys",
+    "enqueue_notification", "claim_pending_notifications", "mark_notification_sent", "mark_notification_failed"
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
-from fastapi.encoders import jsonable_encoder
+from contextlib import contextmanager
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Type, TypeVar, Union
 from pydantic import BaseModel
+from sqlalchemy import cast, column, delete, insert, inspect, select, tuple_, update, values
 from sqlalchemy.orm import Session
 from app.database import Base
 
@@ -8,25 +9,78 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Ключ в Session.info: глубина вложенности unit_of_work
+_UNIT_OF_WORK = "crud_unit_of_work"
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """Несколько операций CRUDBase в одной транзакции с одним коммитом
+
+    Внутри блока операции только отправляют изменения в БД (flush);
+    коммит — при выходе, откат — при исключении. Вложенные блоки
+    присоединяются к внешнему.
+    """
+    depth = db.info.get(_UNIT_OF_WORK, 0)
+    db.info[_UNIT_OF_WORK] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except Exception:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info[_UNIT_OF_WORK] = depth
+
+
+def _as_dict(obj_in: Union[BaseModel, Dict[str, Any]], exclude_unset: bool = False) -> Dict[str, Any]:
+    if isinstance(obj_in, dict):
+        return obj_in
+    return obj_in.model_dump(exclude_unset=exclude_unset)
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """Операции с моделью по ее первичному ключу
+
+    Одиночные операции работают с ORM-объектами, пакетные (*_many) —
+    одним выражением с RETURNING и возвращают строки в виде словарей.
+    Для составного ключа id передается кортежем в порядке колонок ключа.
+    """
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
+        self.table = inspect(model).local_table
+        self.primary_key = inspect(model).primary_key
+        # Генерируемые колонки (например, search_vector) в ответ не попадают
+        self.returning = [c for c in self.table.c if c.computed is None]
+
+    def _key_clause(self):
+        if len(self.primary_key) == 1:
+            return self.primary_key[0]
+        return tuple_(*self.primary_key)
+
+    def _commit(self, db: Session) -> None:
+        if db.info.get(_UNIT_OF_WORK):
+            db.flush()
+        else:
+            db.commit()
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        return db.get(self.model, id)
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return db.scalars(
+            select(self.model).order_by(*self.primary_key).offset(skip).limit(limit)
+        ).all()
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
+    def create(self, db: Session, *, obj_in: Union[CreateSchemaType, Dict[str, Any]]) -> ModelType:
+        db_obj = self.model(**_as_dict(obj_in))
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._commit(db)
         return db_obj
 
     def update(
@@ -36,21 +90,68 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        for field, value in _as_dict(obj_in, exclude_unset=True).items():
+            if field in self.table.c:
+                setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        self._commit(db)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+    def remove(self, db: Session, *, id: Any) -> Optional[ModelType]:
+        obj = db.get(self.model, id)
+        if obj is not None:
+            db.delete(obj)
+            self._commit(db)
         return obj
+
+    def create_many(
+        self, db: Session, objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[dict]:
+        """Вставка пачки строк (executemany с RETURNING)"""
+        if not objs_in:
+            return []
+        rows = db.execute(
+            insert(self.table).returning(*self.returning),
+            [_as_dict(obj_in) for obj_in in objs_in]
+        )
+        created = [row._asdict() for row in rows]
+        self._commit(db)
+        return created
+
+    def update_many(self, db: Session, rows_in: Sequence[Dict[str, Any]]) -> List[dict]:
+        """Обновление пачки строк одним UPDATE ... FROM (VALUES ...) RETURNING
+
+        Каждая строка содержит первичный ключ и обновляемые поля; набор
+        полей у всех строк должен совпадать.
+        """
+        if not rows_in:
+            return []
+        key_names = [c.name for c in self.primary_key]
+        fields = [name for name in rows_in[0] if name not in key_names]
+        if not fields:
+            raise ValueError("update_many requires at least one field to update")
+        names = key_names + fields
+        if any(set(row) != set(names) for row in rows_in):
+            raise ValueError("update_many rows must have the same fields")
+        
+        data = values(
+            *(column(name, self.table.c[name].type) for name in names), name="data"
+        ).data([tuple(row[name] for name in names) for row in rows_in])
+        stmt = (
+            update(self.table)
+            .where(*(self.table.c[name] == cast(data.c[name], self.table.c[name].type) for name in key_names))
+            .values({name: cast(data.c[name], self.table.c[name].type) for name in fields})
+            .returning(*self.returning)
+        )
+        updated = [row._asdict() for row in db.execute(stmt)]
+        self._commit(db)
+        return updated
+
+    def delete_many(self, db: Session, ids: Sequence[Any]) -> List[dict]:
+        """Удаление строк по списку ключей; возвращает удаленные строки"""
+        if not ids:
+            return []
+        stmt = delete(self.table).where(self._key_clause().in_(list(ids))).returning(*self.returning)
+        deleted = [row._asdict() for row in db.execute(stmt)]
+        self._commit(db)
+        return deleted
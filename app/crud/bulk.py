@@ -0,0 +1,53 @@
+"""
+Массовая загрузка данных
+
+COPY через psycopg2 для PostgreSQL и многострочный INSERT для остальных драйверов.
+"""
+import csv
+import io
+from typing import Iterable, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+COPY_NULL = "\\N"
+
+
+def format_pg_array(values: Optional[Sequence[str]]) -> str:
+    """Текстовое представление массива PostgreSQL для COPY (формат CSV)"""
+    if not values:
+        return "{}"
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'"{v}"' for v in escaped) + "}"
+
+
+def copy_rows(db: Session, table: str, columns: List[str], rows: Iterable[Sequence]) -> int:
+    """Загрузка строк в таблицу в текущей транзакции сессии
+
+    Значения массивов должны быть уже приведены format_pg_array, None
+    загружается как NULL. Возвращает число загруженных строк.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    
+    connection = db.connection()
+    if connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([COPY_NULL if value is None else value for value in row])
+        buffer.seek(0)
+        cursor = connection.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        placeholders = ", ".join(f":{column}" for column in columns)
+        connection.execute(
+            text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"),
+            [dict(zip(columns, row)) for row in rows]
+        )
+    return len(rows)
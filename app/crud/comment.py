@@ -1,8 +1,13 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, select, update, func
 from typing import List, Optional
 from app.models.comment import Comment
+from app.models.post import Post
 from app.schemas.comment import CommentCreate, CommentUpdate
+from app.crud.user import get_author_profiles
+
+
+PREVIEW_LENGTH = 140
 
 
 def get_comments_by_post(db: Session, post_id: int, skip: int = 0, limit: int = 100) -> List[Comment]:
@@ -23,6 +28,17 @@ def create_comment(db: Session, comment: CommentCreate, user_id: int) -> Comment
         user_id=user_id
     )
     db.add(db_comment)
+    
+    # Счетчик и превью последнего комментария обновляются в той же транзакции
+    db.execute(
+        update(Post)
+        .where(Post.post_id == comment.post_id)
+        .values(
+            comment_count=Post.comment_count + 1,
+            last_comment_at=func.now(),
+            last_comment_preview=comment.text[:PREVIEW_LENGTH]
+        )
+    )
     db.commit()
     db.refresh(db_comment)
     return db_comment
@@ -39,6 +55,20 @@ def update_comment(db: Session, comment_id: int, comment_update: CommentUpdate,
     
     if comment_update.text is not None:
         comment.text = comment_update.text
+        
+        # Превью поста показывает последний комментарий: правка последнего обновляет его
+        latest_id = (
+            select(Comment.comment_id)
+            .where(Comment.post_id == comment.post_id)
+            .order_by(Comment.created_at.desc(), Comment.comment_id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Post)
+            .where(Post.post_id == comment.post_id, latest_id == comment.comment_id)
+            .values(last_comment_preview=comment_update.text[:PREVIEW_LENGTH])
+        )
     
     db.commit()
     db.refresh(comment)
@@ -55,28 +85,49 @@ def delete_comment(db: Session, comment_id: int, user_id: int) -> bool:
         return False
     
     db.delete(comment)
+    db.flush()
+    
+    # Пересчитываем счетчик и превью по последнему оставшемуся комментарию
+    latest = (
+        select(Comment.created_at, func.left(Comment.text, PREVIEW_LENGTH).label("preview"))
+        .where(Comment.post_id == comment.post_id)
+        .order_by(Comment.created_at.desc(), Comment.comment_id.desc())
+        .limit(1)
+        .subquery()
+    )
+    db.execute(
+        update(Post)
+        .where(Post.post_id == comment.post_id)
+        .values(
+            comment_count=func.greatest(Post.comment_count - 1, 0),
+            last_comment_at=select(latest.c.created_at).scalar_subquery(),
+            last_comment_preview=select(latest.c.preview).scalar_subquery()
+        )
+    )
     db.commit()
     return True
 
 
 def get_comments_with_users(db: Session, post_id: int, skip: int = 0, limit: int = 100) -> List[dict]:
     """Получение комментариев с информацией о пользователях"""
-    comments = db.query(Comment).options(joinedload(Comment.user)).filter(Comment.post_id == post_id).offset(skip).limit(limit).all()
+    # Только нужные колонки комментариев; профили авторов — из общего кэша
+    rows = db.execute(
+        select(
+            Comment.comment_id, Comment.text, Comment.post_id,
+            Comment.user_id, Comment.created_at
+        )
+        .where(Comment.post_id == post_id)
+        .order_by(Comment.created_at, Comment.comment_id)
+        .offset(skip)
+        .limit(limit)
+    ).all()
     
-    comments_with_users = []
-    for comment in comments:
-        comment_data = {
-            "comment_id": comment.comment_id,
-            "text": comment.text,
-            "post_id": comment.post_id,
-            "user_id": comment.user_id,
-            "created_at": comment.created_at,
-            "user": {
-                "user_id": comment.user.user_id,
-                "full_name": comment.user.full_name,
-                "avatar_url": comment.user.avatar_url
-            }
+    authors = get_author_profiles(db, (row.user_id for row in rows))
+    # Автор, удаленный между запросами, не должен ронять всю ленту
+    return [
+        {
+            **row._asdict(),
+            "user": authors.get(row.user_id) or {"user_id": row.user_id, "full_name": None, "avatar_url": None}
         }
-        comments_with_users.append(comment_data)
-    
-    return comments_with_users
+        for row in rows
+    ]
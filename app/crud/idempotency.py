@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, func, null
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any
+from app.models.idempotency import IdempotencyKey
+
+
+def claim_idempotency_key(db: Session, user_id: int, key: str, fingerprint: str, ttl: float) -> bool:
+    """Захват ключа в текущей транзакции (без commit)
+
+    True — ключ новый (или истек) и запрос нужно выполнить; False — ключ уже
+    использован, сохраненный ответ читается get_idempotency_key. Пока
+    транзакция первого запроса не завершена, повтор ждет ее на уникальном
+    индексе и затем получает уже сохраненный ответ.
+    """
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+    stmt = insert(IdempotencyKey).values(user_id=user_id, key=key, fingerprint=fingerprint)
+    result = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": null(),
+                "body": null(),
+                "created_at": func.now(),
+            },
+            where=IdempotencyKey.created_at < expired_before
+        ).returning(IdempotencyKey.user_id)
+    )
+    return result.first() is not None
+
+
+def get_idempotency_key(db: Session, user_id: int, key: str):
+    """Сохраненная запись ключа: строка (fingerprint, status_code, body) или None"""
+    return db.execute(
+        select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.body)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    ).first()
+
+
+def save_idempotency_response(db: Session, user_id: int, key: str, status_code: int, body: Any) -> None:
+    """Сохранение ответа в текущей транзакции (без commit)"""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, body=body)
+    )
+
+
+def delete_expired_idempotency_keys(db: Session, ttl: float) -> int:
+    """Удаление ключей старше ttl секунд"""
+    expired_before = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < expired_before))
+    db.commit()
+    return result.rowcount
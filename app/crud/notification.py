@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from typing import List, Optional
+from app.models.notification import Notification
+
+
+def enqueue_notification(
+    db: Session, user_id: int, kind: str, payload: dict, post_id: Optional[int] = None
+) -> Notification:
+    """Постановка уведомления в outbox (без коммита — в транзакции вызывающего)"""
+    db_notification = Notification(
+        kind=kind,
+        payload=payload,
+        user_id=user_id,
+        post_id=post_id,
+        status="pending",
+        attempts=0
+    )
+    db.add(db_notification)
+    return db_notification
+
+
+def claim_pending_notifications(db: Session, batch_size: int = 100) -> List[Notification]:
+    """Выборка пачки готовых к отправке уведомлений с блокировкой строк
+
+    SKIP LOCKED позволяет нескольким диспетчерам (в том числе в разных воркерах)
+    разбирать outbox параллельно, не получая одни и те же записи.
+    """
+    stmt = (
+        select(Notification)
+        .where(
+            Notification.status == "pending",
+            Notification.next_attempt_at <= func.now()
+        )
+        .order_by(Notification.next_attempt_at, Notification.notification_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return list(db.scalars(stmt))
+
+
+def mark_notification_sent(db: Session, notification: Notification) -> None:
+    """Отметка об успешной доставке"""
+    notification.status = "sent"
+    notification.attempts += 1
+    notification.sent_at = datetime.now(timezone.utc)
+    notification.last_error = None
+
+
+def mark_notification_failed(
+    db: Session, notification: Notification, error: str, max_attempts: int, retry_delay: float
+) -> None:
+    """Отметка о неудачной доставке с экспоненциальной задержкой повтора"""
+    notification.attempts += 1
+    notification.last_error = error[:1000]
+    if notification.attempts >= max_attempts:
+        notification.status = "failed"
+        return
+    delay = retry_delay * (2 ** (notification.attempts - 1))
+    notification.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+
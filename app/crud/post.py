@@ -1,8 +1,17 @@
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from typing import List, Optional
-from app.models.post import Post, posts_users
+from sqlalchemy import (
+    func, and_, or_, select, update, tuple_, cast, literal_column, union_all, text, ARRAY, REAL, String
+)
+from sqlalchemy.dialects.postgresql import array
+from typing import Collection, FrozenSet, List, Optional
+from app.models.post import Post, posts_users, posts_users_archive
 from app.schemas.post import PostCreate
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Множества забронированных пользователем постов (для флага is_booked_by_user)
+booked_posts_cache = TTLCache(maxsize=settings.booked_cache_size, ttl=settings.booked_cache_ttl)
 
 
 def get_posts(db: Session, skip: int = 0, limit: int = 100) -> List[Post]:
@@ -56,8 +65,12 @@ def get_last_tags(db: Session, limit: int = 20) -> List[str]:
     return [row.tag for row in result if row.tag]
 
 
-def book_ticket(db: Session, post_id: int, user_id: int) -> bool:
-    """Бронирование билета с проверкой доступности"""
+def book_ticket(db: Session, post_id: int, user_id: int, commit: bool = True) -> bool:
+    """Бронирование билета с проверкой доступности
+
+    При commit=False транзакция остается открытой, чтобы вызывающий
+    мог записать связанные данные (например, уведомление) атомарно.
+    """
     # Check if ticket is already booked
     existing = db.query(posts_users).filter(
         and_(posts_users.c.post_id == post_id, posts_users.c.user_id == user_id)
@@ -70,6 +83,8 @@ def book_ticket(db: Session, post_id: int, user_id: int) -> bool:
     post = get_post(db, post_id)
     if not post:
         return False  # Post not found
+    if is_past_event(post.event_at):
+        return False  # Event is over
     
     # Count booked tickets
     booked_count = db.query(posts_users).filter(
@@ -84,7 +99,9 @@ def book_ticket(db: Session, post_id: int, user_id: int) -> bool:
     db.execute(
         posts_users.insert().values(post_id=post_id, user_id=user_id)
     )
-    db.commit()
+    if commit:
+        db.commit()
+        invalidate_user_bookings(user_id)
     return True
 
 
@@ -95,14 +112,346 @@ def get_user_tickets(db: Session, user_id: int) -> List[Post]:
     ).all()
 
 
-def cancel_ticket(db: Session, post_id: int, user_id: int) -> bool:
-    """Отмена бронирования билета"""
+def is_past_event(event_at: Optional[datetime]) -> bool:
+    """Событие уже прошло (для постов без даты — нет)"""
+    return event_at is not None and event_at <= datetime.now(timezone.utc)
+
+
+def archive_past_bookings(db: Session, before: datetime, batch_size: int = 5000) -> int:
+    """Перенос пачки бронирований событий, прошедших до before, в posts_users_archive
+
+    Удаление и вставка — одним выражением; SKIP LOCKED позволяет запускать
+    архивацию из нескольких процессов. Строка, уже имеющаяся в архиве
+    (повторное бронирование после отмены), перезаписывается, так что удаленное
+    бронирование не теряется. Возвращает число перенесенных строк
+    (0 — переносить больше нечего).
+    """
+    result = db.execute(text("""
+        WITH batch AS (
+            SELECT pu.post_id, pu.user_id
+            FROM posts_users pu
+            JOIN posts p ON p.post_id = pu.post_id
+            WHERE p.event_at < :before
+            LIMIT :batch_size
+            FOR UPDATE OF pu SKIP LOCKED
+        ), moved AS (
+            DELETE FROM posts_users pu
+            USING batch
+            WHERE pu.post_id = batch.post_id AND pu.user_id = batch.user_id
+            RETURNING pu.post_id, pu.user_id, pu.booked_at
+        )
+        INSERT INTO posts_users_archive (post_id, user_id, booked_at)
+        SELECT post_id, user_id, booked_at FROM moved
+        ON CONFLICT (post_id, user_id) DO UPDATE SET booked_at = excluded.booked_at
+    """), {"before": before, "batch_size": batch_size})
+    db.commit()
+    return result.rowcount
+
+
+def get_user_archived_tickets(db: Session, user_id: int, include_text: bool = True) -> List[dict]:
+    """Билеты пользователя на завершившиеся события (из архива)"""
+    archived = posts_users_archive.alias("archived")
+    archived_count = (
+        select(func.count())
+        .select_from(archived)
+        .where(archived.c.post_id == Post.post_id)
+        .correlate(Post)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            *_post_columns(include_text),
+            posts_users_archive.c.booked_at,
+            archived_count.label("tickets_booked")
+        )
+        .join(posts_users_archive, posts_users_archive.c.post_id == Post.post_id)
+        .where(posts_users_archive.c.user_id == user_id)
+        .order_by(Post.event_at.desc(), Post.post_id.desc())
+    )
+    
+    tickets = []
+    for row in db.execute(stmt):
+        ticket = _with_availability(row._asdict())
+        ticket["is_booked_by_user"] = True
+        tickets.append(ticket)
+    return tickets
+
+
+def get_user_booked_post_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    """Множество post_id, забронированных пользователем
+
+    Кэш у каждого процесса свой: book/cancel сбрасывают его только в своем
+    процессе, поэтому изменения из других воркеров видны не позже чем через
+    settings.booked_cache_ttl секунд.
+    """
+    booked = booked_posts_cache.get(user_id)
+    if booked is None:
+        booked = frozenset(db.scalars(
+            select(posts_users.c.post_id).where(posts_users.c.user_id == user_id)
+        ))
+        booked_posts_cache.set(user_id, booked)
+    return booked
+
+
+def invalidate_user_bookings(user_id: int) -> None:
+    """Сброс кэшированного множества бронирований пользователя"""
+    booked_posts_cache.delete(user_id)
+
+
+def mark_booked_by_user(db: Session, posts: List[dict], user_id: Optional[int]) -> List[dict]:
+    """Заполнение is_booked_by_user для списка постов (не более одного запроса)"""
+    booked = get_user_booked_post_ids(db, user_id) if user_id else frozenset()
+    for post in posts:
+        post["is_booked_by_user"] = post["post_id"] in booked
+    return posts
+
+
+def _post_columns(include_text: bool = True) -> list:
+    """Колонки поста, которые попадают в ответы API"""
+    columns = [
+        Post.post_id, Post.title, Post.tags, Post.views_count,
+        Post.image_url, Post.tickets_limit, Post.created_at, Post.event_at,
+        Post.comment_count, Post.last_comment_at, Post.last_comment_preview
+    ]
+    if include_text:
+        columns.append(Post.text)
+    return columns
+
+
+# Поля ответа, для которых нужен подсчет бронирований
+AVAILABILITY_FIELDS = frozenset({"tickets_available", "tickets_booked", "is_available"})
+
+
+def _listing_columns(fields: Optional[Collection[str]] = None, include_text: bool = True) -> list:
+    """Колонки списка постов с подсчетом бронирований
+
+    fields — поля ответа (None — все): выбираются только нужные для них колонки,
+    а без полей доступности не выполняется и подсчет бронирований.
+    """
+    if fields is None:
+        return [*_post_columns(include_text), _booked_count().label("tickets_booked")]
+    needed = set(fields) | {"post_id"}
+    with_availability = not needed.isdisjoint(AVAILABILITY_FIELDS)
+    if with_availability:
+        needed |= {"tickets_limit", "event_at"}
+    columns = [column for column in _post_columns(include_text) if column.key in needed]
+    if with_availability:
+        columns.append(_booked_count().label("tickets_booked"))
+    return columns
+
+
+def _listing_row(row) -> dict:
+    data = row._asdict()
+    return _with_availability(data) if "tickets_booked" in data else data
+
+
+def _booked_count():
+    """Коррелированный подзапрос: число бронирований поста (по индексу PK posts_users)"""
+    booked = posts_users.alias("booked")
+    return (
+        select(func.count())
+        .select_from(booked)
+        .where(booked.c.post_id == Post.post_id)
+        .correlate(Post)
+        .scalar_subquery()
+    )
+
+
+def _with_availability(data: dict) -> dict:
+    """Дополнение строки поста вычисляемыми полями доступности"""
+    available = data["tickets_limit"] - data["tickets_booked"]
+    data["tickets_available"] = available
+    data["is_available"] = available > 0 and not is_past_event(data.get("event_at"))
+    return data
+
+
+def get_user_tickets_with_availability(
+    db: Session, user_id: int, include_text: bool = True, fields: Optional[Collection[str]] = None
+) -> List[dict]:
+    """Получение билетов пользователя с информацией о доступности одним запросом"""
+    stmt = (
+        select(*_listing_columns(fields, include_text))
+        .join(posts_users, posts_users.c.post_id == Post.post_id)
+        .where(posts_users.c.user_id == user_id)
+        .order_by(Post.post_id)
+    )
+    
+    tickets = []
+    for row in db.execute(stmt):
+        ticket = _listing_row(row)
+        ticket["is_booked_by_user"] = True
+        tickets.append(ticket)
+    return tickets
+
+
+def get_post_detail(db: Session, post_id: int, increment_views: bool = True) -> Optional[dict]:
+    """Получение поста с доступностью билетов за один запрос
+
+    При increment_views=True счетчик просмотров увеличивается в том же
+    выражении: UPDATE ... RETURNING в CTE и подсчет бронирований поверх него.
+    """
+    if increment_views:
+        bumped = (
+            update(Post)
+            .where(Post.post_id == post_id)
+            .values(views_count=func.coalesce(Post.views_count, 0) + 1)
+            .returning(*_post_columns())
+            .cte("bumped")
+        )
+        booked = posts_users.alias("booked")
+        booked_count = (
+            select(func.count())
+            .select_from(booked)
+            .where(booked.c.post_id == bumped.c.post_id)
+            .scalar_subquery()
+        )
+        stmt = select(bumped, booked_count.label("tickets_booked"))
+    else:
+        stmt = select(*_post_columns(), _booked_count().label("tickets_booked")).where(
+            Post.post_id == post_id
+        )
+    
+    row = db.execute(stmt).first()
+    if increment_views:
+        db.commit()
+    if row is None:
+        return None
+    return _with_availability(row._asdict())
+
+
+SEARCH_CONFIG = "russian"
+
+
+def search_posts(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    after_rank: Optional[float] = None,
+    after_id: Optional[int] = None
+) -> List[dict]:
+    """Полнотекстовый поиск постов с ранжированием, подсветкой и keyset-пагинацией
+
+    Страница отбирается по GIN-индексу и сортируется по (rank, post_id);
+    ts_headline вычисляется только для строк страницы.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(Post.search_vector, tsquery)
+    
+    page = select(Post.post_id, rank.label("rank")).where(Post.search_vector.op("@@")(tsquery))
+    if after_rank is not None and after_id is not None:
+        # ts_rank_cd возвращает real: курсор сравнивается в том же типе, иначе при
+        # расширении до double строки с равным рангом пропускаются
+        page = page.where(tuple_(rank, Post.post_id) < tuple_(cast(after_rank, REAL), after_id))
+    page = page.order_by(rank.desc(), Post.post_id.desc()).limit(limit).subquery()
+    
+    stmt = (
+        select(
+            *_post_columns(include_text=False),
+            _booked_count().label("tickets_booked"),
+            page.c.rank,
+            func.ts_headline(
+                SEARCH_CONFIG, Post.title, tsquery, "HighlightAll=true"
+            ).label("title_highlight"),
+            func.ts_headline(
+                SEARCH_CONFIG, Post.text, tsquery, "MaxFragments=2, MinWords=10, MaxWords=30"
+            ).label("text_highlight")
+        )
+        .join(page, page.c.post_id == Post.post_id)
+        .order_by(page.c.rank.desc(), Post.post_id.desc())
+    )
+    return [_with_availability(row._asdict()) for row in db.execute(stmt)]
+
+
+POST_SORTS = {
+    "recent": (Post.created_at.desc(), Post.post_id.desc()),
+    "popular": (Post.views_count.desc().nulls_last(), Post.post_id.desc()),
+}
+
+
+def _post_filter_conditions(
+    tags: Optional[List[str]],
+    match_all: bool,
+    only_available: bool,
+    created_from: Optional[datetime],
+    created_to: Optional[datetime]
+) -> list:
+    conditions = []
+    if tags:
+        tags_array = cast(array(tags), ARRAY(String))
+        # @> — все теги, && — хотя бы один; оба оператора используют GIN-индекс
+        conditions.append(Post.tags.op("@>" if match_all else "&&")(tags_array))
+    if created_from is not None:
+        conditions.append(Post.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(Post.created_at < created_to)
+    if only_available:
+        conditions.append(_booked_count() < Post.tickets_limit)
+        conditions.append(or_(Post.event_at.is_(None), Post.event_at > func.now()))
+    return conditions
+
+
+def filter_posts(
+    db: Session,
+    tags: Optional[List[str]] = None,
+    match_all: bool = False,
+    only_available: bool = False,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    sort: str = "recent",
+    skip: int = 0,
+    limit: int = 20,
+    facet_limit: int = 50
+) -> dict:
+    """Фильтрация постов с подсчетом фасетов по тегам
+
+    Два запроса: страница постов и общий подсчет (итог + число постов
+    по каждому тегу) по тому же отфильтрованному набору.
+    """
+    conditions = _post_filter_conditions(tags, match_all, only_available, created_from, created_to)
+    
+    items_stmt = (
+        select(*_post_columns(), _booked_count().label("tickets_booked"))
+        .where(*conditions)
+        .order_by(*POST_SORTS[sort])
+        .offset(skip)
+        .limit(limit)
+    )
+    items = [_with_availability(row._asdict()) for row in db.execute(items_stmt)]
+    
+    filtered = select(Post.tags).where(*conditions).cte("filtered")
+    tag = func.unnest(filtered.c.tags).label("tag")
+    tags_stmt = select(tag).select_from(filtered).subquery()
+    counts_stmt = union_all(
+        select(literal_column("NULL").label("tag"), func.count().label("count")).select_from(filtered),
+        select(tags_stmt.c.tag, func.count().label("count"))
+        .group_by(tags_stmt.c.tag)
+        .order_by(func.count().desc(), tags_stmt.c.tag)
+        .limit(facet_limit)
+    )
+    total = 0
+    facets = []
+    for row in db.execute(counts_stmt):
+        if row.tag is None:
+            total = row.count
+        else:
+            facets.append({"tag": row.tag, "count": row.count})
+    
+    return {"items": items, "total": total, "facets": facets}
+
+
+def cancel_ticket(db: Session, post_id: int, user_id: int, commit: bool = True) -> bool:
+    """Отмена бронирования билета
+
+    При commit=False фиксирует транзакцию и сбрасывает кэш бронирований вызывающий.
+    """
     result = db.execute(
         posts_users.delete().where(
             and_(posts_users.c.post_id == post_id, posts_users.c.user_id == user_id)
         )
     )
-    db.commit()
+    if commit:
+        db.commit()
+        invalidate_user_bookings(user_id)
     return result.rowcount > 0
 
 
@@ -117,7 +466,7 @@ def get_tickets_availability(db: Session, post_id: int, user_id: int = None) ->
     ).count()
     
     available = post.tickets_limit - booked_count
-    is_available = available > 0
+    is_available = available > 0 and not is_past_event(post.event_at)
     
     # Проверяем, забронирован ли билет конкретным пользователем
     is_booked_by_user = False
@@ -136,27 +485,28 @@ def get_tickets_availability(db: Session, post_id: int, user_id: int = None) ->
     }
 
 
-def get_posts_with_availability(db: Session, skip: int = 0, limit: int = 100, user_id: int = None) -> List[dict]:
-    """Получение постов с информацией о доступности билетов"""
-    posts = get_posts(db, skip=skip, limit=limit)
-    
-    posts_with_availability = []
-    for post in posts:
-        availability = get_tickets_availability(db, post.post_id, user_id)
-        post_data = {
-            "post_id": post.post_id,
-            "title": post.title,
-            "text": post.text,
-            "tags": post.tags,
-            "views_count": post.views_count,
-            "image_url": post.image_url,
-            "tickets_limit": post.tickets_limit,
-            "created_at": post.created_at,
-            "tickets_available": availability["available"],
-            "tickets_booked": availability["booked"],
-            "is_available": availability["is_available"],
-            "is_booked_by_user": availability["is_booked_by_user"]
-        }
-        posts_with_availability.append(post_data)
-    
-    return posts_with_availability
+def get_posts_with_availability(
+    db: Session, skip: int = 0, limit: int = 100, user_id: int = None, fields: Optional[Collection[str]] = None
+) -> List[dict]:
+    """Получение постов с информацией о доступности билетов (fields — только эти поля)"""
+    stmt = (
+        select(*_listing_columns(fields))
+        .order_by(Post.post_id)
+        .offset(skip)
+        .limit(limit)
+    )
+    posts = [_listing_row(row) for row in db.execute(stmt)]
+    return mark_booked_by_user(db, posts, user_id)
+
+
+def get_posts_by_tag_with_availability(
+    db: Session, tag: str, user_id: int = None, fields: Optional[Collection[str]] = None
+) -> List[dict]:
+    """Получение постов по тегу с информацией о доступности билетов (fields — только эти поля)"""
+    stmt = (
+        select(*_listing_columns(fields))
+        .where(func.array_to_string(Post.tags, ',').contains(tag))
+        .order_by(Post.post_id)
+    )
+    posts = [_listing_row(row) for row in db.execute(stmt)]
+    return mark_booked_by_user(db, posts, user_id)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Tuple
+from app.models.token import RevokedToken
+
+
+def revoke_token(db: Session, jti: str, expires_at: datetime) -> bool:
+    """Отзыв токена; False, если он уже был отозван"""
+    result = db.execute(
+        insert(RevokedToken)
+        .values(jti=jti, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+    )
+    db.commit()
+    return result.rowcount > 0
+
+
+def get_revocations_since(db: Session, since: Optional[datetime]) -> Tuple[List[tuple], datetime]:
+    """Действующие отзывы, сделанные начиная с since, и время БД на момент выборки"""
+    synced_at = db.execute(select(func.now())).scalar()
+    stmt = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > synced_at)
+    if since is not None:
+        stmt = stmt.where(RevokedToken.revoked_at >= since)
+    return [tuple(row) for row in db.execute(stmt)], synced_at
+
+
+def delete_expired_revocations(db: Session) -> int:
+    """Удаление отзывов истекших токенов"""
+    result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+    db.commit()
+    return result.rowcount
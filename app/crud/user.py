@@ -1,9 +1,15 @@
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import event, select
+from typing import Dict, Iterable, Optional
 from app.models.user import User
 from app.schemas.user import UserCreate
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import get_password_hash
 
+# Публичные профили авторов (для лент комментариев)
+author_profiles = TTLCache(maxsize=settings.author_cache_size, ttl=settings.author_cache_ttl)
+
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     """Получение пользователя по ID"""
@@ -39,3 +45,45 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     if not verify_password(password, user.password_hash):
         return None
     return user
+
+
+def get_author_profiles(db: Session, user_ids: Iterable[int]) -> Dict[int, dict]:
+    """Получение публичных профилей авторов (user_id, full_name, avatar_url) через кэш"""
+    user_ids = set(user_ids)
+    profiles = author_profiles.get_many(user_ids)
+    missing = user_ids - profiles.keys()
+    if missing:
+        rows = db.execute(
+            select(User.user_id, User.full_name, User.avatar_url).where(User.user_id.in_(missing))
+        )
+        loaded = {row.user_id: row._asdict() for row in rows}
+        author_profiles.set_many(loaded)
+        profiles.update(loaded)
+    return profiles
+
+
+_CHANGED_AUTHORS = "changed_author_ids"
+
+
+@event.listens_for(User, "after_update")
+def _remember_changed_author(mapper, connection, target: User) -> None:
+    """Запоминание измененного пользователя до фиксации транзакции"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_AUTHORS, set()).add(target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_author_profiles(session: Session) -> None:
+    """Сброс кэшированных профилей после commit
+
+    До фиксации другой запрос перечитал бы из БД старый профиль и снова
+    положил его в кэш.
+    """
+    for user_id in session.info.pop(_CHANGED_AUTHORS, ()):
+        author_profiles.delete(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_authors(session: Session) -> None:
+    session.info.pop(_CHANGED_AUTHORS, None)
@@ -1,10 +1,245 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.postgres_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+_pool_ready = threading.Event()
+
+
+def get_engine() -> Engine:
+    """Движок базы данных, создается при первом обращении"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    settings.postgres_url,
+                    pool_size=settings.db_pool_size,
+                    max_overflow=settings.db_max_overflow,
+                    pool_pre_ping=True
+                )
+                SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def dispose_engine() -> None:
+    """Закрытие соединений пула (при остановке приложения)"""
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _pool_ready.clear()
+    replica_router.dispose()
+
+
+def _reset_after_fork() -> None:
+    # Соединения родителя не должны использоваться дочерним процессом:
+    # пул сбрасывается без закрытия сокетов, принадлежащих родителю
+    global _engine_lock
+    _engine_lock = threading.Lock()
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _pool_ready.clear()
+    replica_router.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_pool(size: Optional[int] = None) -> None:
+    """Открытие size соединений пула заранее, до первых запросов"""
+    engine = get_engine()
+    connections = []
+    try:
+        for _ in range(size if size is not None else settings.db_pool_size):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+    _pool_ready.set()
+
+
+def pool_ready() -> bool:
+    """Пул прогрет и база отвечает"""
+    return _pool_ready.is_set()
+
+
+# Отставание реплики в секундах; 0 — все полученные WAL применены
+# (на сервере не в режиме восстановления тоже 0), NULL — еще ничего не применено
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+class ReplicaRouter:
+    """Выбор реплики для чтения
+
+    Реплика используется, только если последняя проверка прошла успешно и
+    отставание не больше max_lag; иначе чтение идет на primary. Обрыв
+    соединения или ошибка запроса к реплике исключает ее до следующей проверки.
+    """
+
+    def __init__(self, urls: List[str], max_lag: float, pool_size: int, max_overflow: int):
+        self.urls = list(urls)
+        self.max_lag = max_lag
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self._engines: Dict[str, Engine] = {}
+        self._lag: Dict[str, Optional[float]] = {}  # None — недоступна
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _engine(self, url: str) -> Engine:
+        engine = self._engines.get(url)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(url)
+                if engine is None:
+                    engine = create_engine(
+                        url,
+                        pool_size=self.pool_size,
+                        max_overflow=self.max_overflow,
+                        pool_pre_ping=True,
+                        execution_options={"postgresql_readonly": True}
+                    )
+                    event.listen(engine, "handle_error", self._on_error(url))
+                    self._engines[url] = engine
+        return engine
+
+    def _on_error(self, url: str):
+        def handle_error(context):
+            if context.is_disconnect:
+                self._lag[url] = None
+        return handle_error
+
+    def check(self) -> None:
+        """Проверка доступности и отставания всех реплик"""
+        for url in self.urls:
+            try:
+                with self._engine(url).connect() as connection:
+                    lag = connection.execute(text(REPLICA_LAG_SQL)).scalar()
+                self._lag[url] = float("inf") if lag is None else float(lag)
+            except Exception as e:
+                if url not in self._lag or self._lag[url] is not None:  # логируем только смену состояния
+                    logger.warning("Read replica %s is unavailable: %s", self._display(url), e)
+                self._lag[url] = None
+
+    def pick(self) -> Optional[Engine]:
+        """Движок подходящей реплики (по кругу) или None — читать с primary"""
+        candidates = [
+            url for url in self.urls
+            if self._lag.get(url) is not None and self._lag[url] <= self.max_lag
+        ]
+        if not candidates:
+            return None
+        return self._engine(candidates[next(self._counter) % len(candidates)])
+
+    def mark_unavailable(self, engine: Engine) -> None:
+        """Исключение реплики до следующей проверки (ошибка при запросе)"""
+        for url, replica in list(self._engines.items()):
+            if replica is engine:
+                if self._lag.get(url) is not None:
+                    logger.warning("Read replica %s failed, reading from primary", self._display(url))
+                self._lag[url] = None
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "replica": self._display(url),
+                "available": self._lag.get(url) is not None,
+                "lag_seconds": self._lag.get(url),
+            }
+            for url in self.urls
+        ]
+
+    def dispose(self) -> None:
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines = {}
+            self._lag = {}
+
+    def reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        for engine in self._engines.values():
+            engine.dispose(close=False)
+
+    @staticmethod
+    def _display(url: str) -> str:
+        return make_url(url).render_as_string(hide_password=True)
+
+
+replica_router = ReplicaRouter(
+    settings.replica_urls,
+    max_lag=settings.replica_max_lag_seconds,
+    pool_size=settings.replica_pool_size,
+    max_overflow=settings.replica_max_overflow
+)
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker, создающий движок при первой сессии"""
+
+    def __call__(self, **local_kw):
+        if "bind" not in self.kw and "bind" not in local_kw:
+            get_engine()
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+
+
+class _ReplicaSession(Session):
+    """Сессия чтения с реплики
+
+    Запрос, упавший на реплике с OperationalError (реплика остановлена,
+    соединение оборвано), повторяется на primary, а реплика исключается до
+    следующей проверки — запрос пользователя не получает 500.
+    """
+
+    def execute(self, *args, **kwargs):
+        return self._with_fallback(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._with_fallback(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._with_fallback(super().scalars, *args, **kwargs)
+
+    def _with_fallback(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except OperationalError:
+            primary = get_engine()
+            if self.bind is primary:
+                raise
+            replica_router.mark_unavailable(self.bind)
+            # Соединение реплики освобождается, дальше сессия читает с primary
+            self.rollback()
+            self.bind = primary
+            return method(*args, **kwargs)
+
+
+ReplicaSessionLocal = sessionmaker(class_=_ReplicaSession, autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -16,3 +251,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Сессия только для чтения: реплика, если есть подходящая, иначе primary
+
+    Не использовать там, где нужно прочитать только что записанное
+    (бронирования, билеты пользователя). Ошибка соединения с репликой
+    переводит сессию на primary.
+    """
+    engine = replica_router.pick()
+    db = ReplicaSessionLocal(bind=engine) if engine is not None else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def __getattr__(name):
+    # Совместимость: app.database.engine создает движок лениво
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
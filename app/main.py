@@ -1,22 +1,193 @@
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.database import engine
-from app.models import User, Post, Comment
-from app.api.v1 import auth_router, posts_router, comments_router
+from app.database import SessionLocal, warm_pool, dispose_engine, replica_router
+from app.api.v1 import auth_router, posts_router, comments_router, admin_router, health_router
+from app.services.notifications import create_dispatcher
+from app.services.view_counter import view_counter
+from app.services.trending import refresh_trending
+from app.services.catalog import popular_tags
+from app.services.auth_tokens import revocation_syncer
+from app.core.scheduler import scheduler
+from app.core.security import verified_tokens
+from app.middleware import RateLimitMiddleware, CompressionMiddleware, PrecompressedStaticFiles
+from app.crud.post import archive_past_bookings, booked_posts_cache
+from app.crud.user import author_profiles
+from app.crud.token import delete_expired_revocations
+from app.crud.idempotency import delete_expired_idempotency_keys
+
+logger = logging.getLogger(__name__)
+
+# Схема БД создается миграциями (python scripts/migrate.py upgrade), не при импорте
+UPLOADS_DIR = "uploads"
+POOL_WARMUP_RETRY_INTERVAL = 1.0
+
+
+# Deferred view counts flushing
+def flush_view_counts():
+    db = SessionLocal()
+    try:
+        view_counter.flush(db)
+    finally:
+        db.close()
+
+
+# Trending recompute
+def run_trending_refresh():
+    db = SessionLocal()
+    try:
+        refresh_trending(db)
+    finally:
+        db.close()
+
+
+# Popular tags recompute
+def refresh_popular_tags():
+    db = SessionLocal()
+    try:
+        popular_tags.refresh(db)
+    finally:
+        db.close()
+
+
+# Bookings archival
+def archive_bookings():
+    before = datetime.now(timezone.utc) - timedelta(hours=settings.booking_archive_grace_hours)
+    db = SessionLocal()
+    try:
+        while archive_past_bookings(db, before, settings.booking_archive_batch_size):
+            pass
+    finally:
+        db.close()
+
+
+# Revoked tokens sync
+def sync_revoked_tokens():
+    db = SessionLocal()
+    try:
+        revocation_syncer.sync(db)
+    finally:
+        db.close()
+
+
+# Expired revocations purge
+def purge_expired_revocations():
+    db = SessionLocal()
+    try:
+        delete_expired_revocations(db)
+    finally:
+        db.close()
+
+
+# Expired idempotency keys purge
+def purge_idempotency_keys():
+    db = SessionLocal()
+    try:
+        delete_expired_idempotency_keys(db, settings.idempotency_ttl)
+    finally:
+        db.close()
+
+
+# Expired in-process cache entries
+def sweep_caches():
+    for cache in (verified_tokens, booked_posts_cache, author_profiles):
+        cache.sweep()
+
+
+def _warm_pool_until_ready(stop: threading.Event) -> None:
+    """Прогрев пула в фоне; до успеха /health/ready отвечает 503"""
+    if settings.replica_urls:
+        replica_router.check()
+    while not stop.is_set():
+        try:
+            warm_pool()
+            break
+        except Exception as e:
+            logger.warning("Database pool warmup failed: %s", e)
+            stop.wait(POOL_WARMUP_RETRY_INTERVAL)
+    else:
+        return
+    try:
+        sync_revoked_tokens()
+    except Exception:
+        logger.exception("Initial revoked tokens sync failed")
+
+
+def _every(interval: float) -> dict:
+    return {"interval": interval, "jitter": interval * settings.scheduler_jitter}
+
+
+def register_jobs() -> None:
+    """Фоновые задачи процесса; leader=True — одна на все инстансы"""
+    # Буферы и кэши в памяти: в каждом процессе, финальный сброс при остановке
+    if settings.deferred_view_counts:
+        scheduler.add_job(
+            "view-count-flush", flush_view_counts,
+            run_on_shutdown=True, **_every(settings.view_count_flush_interval)
+        )
+    if settings.trending_enabled:
+        scheduler.add_job(
+            "trending-refresh", run_trending_refresh,
+            run_on_shutdown=True, **_every(settings.trending_recompute_interval)
+        )
+    scheduler.add_job("popular-tags-refresh", refresh_popular_tags, **_every(settings.tag_stats_refresh_interval))
+    scheduler.add_job("revocation-sync", sync_revoked_tokens, **_every(settings.revocation_sync_interval))
+    scheduler.add_job("cache-sweep", sweep_caches, **_every(settings.cache_sweep_interval))
+    if settings.replica_urls:
+        scheduler.add_job(
+            "replica-health-check", replica_router.check, **_every(settings.replica_health_check_interval)
+        )
+    # Изменения данных в БД: только процесс-лидер
+    scheduler.add_job("revocation-purge", purge_expired_revocations, cron=settings.revocation_purge_cron, leader=True)
+    scheduler.add_job(
+        "idempotency-purge", purge_idempotency_keys, cron=settings.idempotency_purge_cron, leader=True
+    )
+    if settings.booking_archive_enabled:
+        scheduler.add_job(
+            "booking-archive", archive_bookings, leader=True, **_every(settings.booking_archive_interval)
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+
+    stop_warmup = threading.Event()
+    threading.Thread(
+        target=_warm_pool_until_ready, args=(stop_warmup,), name="pool-warmup", daemon=True
+    ).start()
+
+    # Background notification delivery (outbox)
+    notification_dispatcher = create_dispatcher(SessionLocal)
+    if settings.notifications_enabled:
+        notification_dispatcher.start()
+    register_jobs()
+    scheduler.start()
+
+    yield
+
+    stop_warmup.set()
+    notification_dispatcher.stop()
+    await scheduler.stop(settings.scheduler_shutdown_timeout)
+    dispose_engine()
 
-# Create database tables
-User.metadata.create_all(bind=engine)
-Post.metadata.create_all(bind=engine)
-Comment.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.project_name,
     version="1.0.0",
-    description="API для бронирования билетов"
+    description="API для бронирования билетов",
+    lifespan=lifespan
 )
 
+# Rate limiting (внутри CORS, чтобы ответы 429 получали CORS-заголовки)
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -33,21 +204,25 @@ app.add_middleware(
         "Origin",
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers",
+        "Idempotency-Key",
     ],
     expose_headers=["*"],
 )
 
-# Create uploads directory
-import os
-os.makedirs("uploads", exist_ok=True)
+# Response compression (снаружи всех, чтобы сжимать и ответы с CORS-заголовками)
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
 
-# Mount static files
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# Mount static files (каталог создается в lifespan; рядом могут лежать сжатые копии .br/.gz)
+app.mount("/uploads", PrecompressedStaticFiles(directory=UPLOADS_DIR, check_dir=False), name="uploads")
 
 # Include routers
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(posts_router, prefix="/posts", tags=["posts"])
 app.include_router(comments_router, prefix="/comments", tags=["comments"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
+app.include_router(health_router, prefix="/health", tags=["health"])
+
 
 # Root endpoint
 @app.get("/")
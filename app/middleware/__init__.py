@@ -0,0 +1,10 @@
+"""
+ASGI middleware
+
+Обработка запросов до маршрутизации FastAPI.
+"""
+
+from .rate_limit import RateLimitMiddleware
+from .compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_file
+
+__all__ = ["RateLimitMiddleware", "CompressionMiddleware", "PrecompressedStaticFiles", "precompress_file"]
@@ -0,0 +1,237 @@
+"""
+Сжатие ответов
+
+Ответы больше settings.compression_min_size сжимаются brotli (если установлен
+пакет brotli) или gzip по заголовку Accept-Encoding. Уже сжатые форматы
+(изображения, архивы) и ответы с Content-Encoding не трогаются. Большие тела
+сжимаются в пуле потоков, чтобы не задерживать event loop; потоковые ответы
+(экспорт) сжимаются по частям.
+
+Для /uploads отдаются заранее сжатые копии файлов (file.svg.br, file.svg.gz),
+если они есть рядом с оригиналом.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import stat
+import zlib
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.staticfiles import StaticFiles
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Сжимаемые типы, несмотря на префикс из compression_excluded_types
+ALWAYS_COMPRESSIBLE = {"image/svg+xml"}
+# Расширения заранее сжатых копий в порядке предпочтения
+SIDECAR_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def supported_encodings() -> List[str]:
+    """Кодировки, которые процесс умеет сжимать сам, в порядке предпочтения"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def accepted_encodings(accept_encoding: str, supported: List[str]) -> List[str]:
+    """Кодировки из supported, принимаемые клиентом, в порядке supported"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+    wildcard = weights.get("*", 0.0)
+    return [encoding for encoding in supported if weights.get(encoding, wildcard) > 0]
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in ALWAYS_COMPRESSIBLE:
+        return True
+    return not media_type.startswith(tuple(settings.compression_excluded_types))
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Сжатие тела целиком"""
+    if encoding == "br":
+        quality = settings.compression_brotli_quality if level is None else level
+        return brotli.compress(data, quality=quality)
+    # mtime=0 — одинаковое тело дает одинаковый результат
+    return gzip.compress(data, compresslevel=settings.compression_gzip_level if level is None else level, mtime=0)
+
+
+class _StreamCompressor:
+    """Потоковое сжатие частей ответа"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            # wbits=31 — формат gzip
+            self._compressor = zlib.compressobj(settings.compression_gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+async def _offload(func, *args):
+    """Вызов в пуле потоков для больших данных, иначе на месте"""
+    if len(args[0]) >= settings.compression_offload_size:
+        return await run_in_threadpool(func, *args)
+    return func(*args)
+
+
+class CompressionMiddleware:
+    """ASGI middleware сжатия ответов gzip/brotli"""
+
+    def __init__(self, app, min_size: Optional[int] = None):
+        self.app = app
+        self.min_size = settings.compression_min_size if min_size is None else min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encodings = accepted_encodings(
+            Headers(scope=scope).get("accept-encoding", ""), supported_encodings()
+        )
+        if not encodings:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(send, encodings[0], self.min_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send, encoding: str, min_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self._start = None
+        self._compressor: Optional[_StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            if (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not is_compressible(headers.get("content-type"))
+            ):
+                self._passthrough = True
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            if not more_body:
+                await self._send_whole(start, body)
+                return
+            headers = MutableHeaders(scope=start)
+            del headers["content-length"]
+            self._mark_encoded(headers)
+            self._compressor = _StreamCompressor(self.encoding)
+            await self._send(start)
+
+        chunk = await _offload(self._compressor.compress, body) if body else b""
+        if not more_body:
+            chunk += self._compressor.finish()
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_whole(self, start, body: bytes) -> None:
+        if len(body) >= self.min_size:
+            body = await _offload(compress, body, self.encoding)
+            headers = MutableHeaders(scope=start)
+            headers["content-length"] = str(len(body))
+            self._mark_encoded(headers)
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body})
+
+    def _mark_encoded(self, headers: MutableHeaders) -> None:
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        # Сжатое представление не совпадает побайтно с исходным
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = f"W/{etag}"
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles, отдающие file.br / file.gz вместо file, если клиент их принимает"""
+
+    async def get_response(self, path: str, scope):
+        encodings = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""), list(SIDECAR_EXTENSIONS))
+        if encodings and scope["method"] in ("GET", "HEAD"):
+            original_path, original_stat = await run_in_threadpool(self.lookup_path, path)
+            if original_stat is not None and stat.S_ISREG(original_stat.st_mode):
+                for encoding in encodings:
+                    full_path, stat_result = await run_in_threadpool(
+                        self.lookup_path, path + SIDECAR_EXTENSIONS[encoding]
+                    )
+                    # Копия старше оригинала (файл перезаписан) не используется
+                    if (
+                        stat_result is not None and stat.S_ISREG(stat_result.st_mode)
+                        and stat_result.st_mtime >= original_stat.st_mtime
+                    ):
+                        response = self.file_response(full_path, stat_result, scope)
+                        media_type, _ = mimetypes.guess_type(original_path)
+                        response.headers["content-type"] = media_type or "application/octet-stream"
+                        response.headers["content-encoding"] = encoding
+                        response.headers.add_vary_header("Accept-Encoding")
+                        return response
+        return await super().get_response(path, scope)
+
+
+def precompress_file(path: str) -> List[str]:
+    """Запись сжатых копий файла с максимальным уровнем; возвращает пути копий
+
+    Файлы несжимаемых типов и меньше compression_min_size пропускаются.
+    """
+    media_type, _ = mimetypes.guess_type(path)
+    if not is_compressible(media_type) or os.path.getsize(path) < settings.compression_min_size:
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    for encoding in supported_encodings():
+        compressed = compress(data, encoding, level=11 if encoding == "br" else 9)
+        # Копия, не дающая выигрыша, только отнимала бы место
+        if len(compressed) >= len(data):
+            continue
+        sidecar = path + SIDECAR_EXTENSIONS[encoding]
+        with open(sidecar, "wb") as f:
+            f.write(compressed)
+        written.append(sidecar)
+    return written
@@ -0,0 +1,190 @@
+"""
+Ограничение частоты запросов
+
+Token bucket на пару (маршрут, клиент): клиент — пользователь из JWT, для
+анонимных запросов — IP-адрес. Лимиты задаются для отдельных маршрутов
+(settings.rate_limit_routes) и по умолчанию для остальных. Отказ (429)
+выдается до маршрутизации, то есть до открытия сессии БД и bcrypt.
+
+Хранилище корзин — память процесса или Redis (общий лимит для всех
+процессов, нужен пакет redis).
+"""
+import json
+import logging
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+def parse_rate(value: str) -> Tuple[float, float]:
+    """'10/minute' -> (скорость пополнения в секунду, емкость корзины)"""
+    count, _, period = value.partition("/")
+    if period not in PERIODS:
+        raise ValueError(f"Invalid rate limit: {value}")
+    capacity = float(count)
+    return capacity / PERIODS[period], capacity
+
+
+class MemoryBucketStore:
+    """Корзины в памяти процесса
+
+    Состояние корзины — кортеж (токены, время обновления). Полностью
+    пополнившиеся корзины неотличимы от новых и удаляются при очистке.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0):
+        self.sweep_interval = sweep_interval
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        """Списание токена; 0 — запрос разрешен, иначе секунды до следующего токена"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now, rate, capacity)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now, rate, capacity)
+                wait = (1 - tokens) / rate
+            if now - self._swept_at >= self.sweep_interval:
+                self._sweep(now)
+        return wait
+
+    def sweep(self) -> int:
+        """Удаление полностью пополнившихся корзин; возвращает число удаленных"""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def _sweep(self, now: float) -> int:
+        full = [
+            key for key, (tokens, updated, rate, capacity) in self._buckets.items()
+            if tokens + (now - updated) * rate >= capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+        self._swept_at = now
+        return len(full)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Атомарный token bucket в Redis; время берется с сервера Redis,
+# чтобы часы процессов не влияли на результат
+_REDIS_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """Корзины в Redis, общие для всех процессов; истекают сами (PEXPIRE)
+
+    При недоступности Redis запросы пропускаются: ограничение частоты
+    не должно останавливать API.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the redis package (pip install redis)")
+        self.prefix = prefix
+        # Асинхронный клиент: ожидание Redis не блокирует event loop
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._take = self._client.register_script(_REDIS_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: float) -> float:
+        try:
+            return float(await self._take(keys=[self.prefix + key], args=[rate, capacity]))
+        except Exception as e:
+            logger.warning("Rate limit store unavailable: %s", e)
+            return 0.0
+
+    def sweep(self) -> int:
+        return 0
+
+
+def build_store():
+    """Хранилище корзин по настройкам"""
+    if settings.rate_limit_backend == "redis":
+        return RedisBucketStore(settings.rate_limit_redis_url)
+    if settings.rate_limit_backend == "memory":
+        return MemoryBucketStore(settings.rate_limit_sweep_interval)
+    raise ValueError(f"Unknown rate limit backend: {settings.rate_limit_backend}")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware с token bucket на маршрут и клиента"""
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store if store is not None else build_store()
+        self.default_rate = parse_rate(settings.rate_limit_default)
+        self.route_rates = {route: parse_rate(rate) for route, rate in settings.rate_limit_routes.items()}
+        self.exempt_prefixes = tuple(settings.rate_limit_exempt_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        rate, capacity = self.route_rates.get(route, self.default_rate)
+        # Маршруты без собственного лимита делят общую корзину клиента
+        bucket = route if route in self.route_rates else "*"
+        wait = await self.store.take(f"{bucket}|{self._client_key(scope)}", rate, capacity)
+        if wait <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _client_key(scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    user_id = verify_token(token)
+                    if user_id is not None:
+                        return f"u:{user_id}"
+                break
+        client: Optional[tuple] = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
@@ -0,0 +1,11 @@
+"""
+Миграции схемы базы данных
+
+Версионированные миграции применяются явно (scripts/migrate.py), а не при
+импорте приложения. Поддерживаются неблокирующие индексы (CREATE INDEX
+CONCURRENTLY) и возобновляемые пакетные заполнения данных.
+"""
+
+from .runner import MigrationRunner, MigrationContext, MigrationError
+
+__all__ = ["MigrationRunner", "MigrationContext", "MigrationError"]
@@ -0,0 +1,254 @@
+"""
+Применение миграций
+
+Версии хранятся в schema_migrations, контрольные точки пакетных заполнений —
+в schema_migration_progress. Одновременный запуск из нескольких мест
+исключается advisory-блокировкой PostgreSQL.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+import time
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_PACKAGE = "app.migrations.versions"
+# Произвольная константа для pg_advisory_lock
+MIGRATIONS_LOCK_ID = 7_315_001
+
+_MODULE_NAME = re.compile(r"^(\d{4})_(\w+)$")
+
+
+class MigrationError(Exception):
+    """Ошибка применения миграции"""
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+
+class MigrationContext:
+    """Операции, доступные миграции"""
+
+    def __init__(self, engine: Engine, version: int, connection: Optional[Connection] = None):
+        self.engine = engine
+        self.version = version
+        self.connection = connection
+
+    def execute(self, sql: str, params: Optional[Dict[str, Any]] = None):
+        """Выполнение SQL в транзакции миграции (или в autocommit для нетранзакционной)
+
+        В autocommit соединение закрывается сразу, поэтому строки результата
+        читаются до закрытия и возвращаются буферизованным Result.
+        """
+        if self.connection is not None:
+            return self.connection.execute(text(sql), params or {})
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            result = connection.execute(text(sql), params or {})
+            return result.freeze()() if result.returns_rows else result
+
+    def create_index_concurrently(
+        self,
+        name: str,
+        table: str,
+        columns: str,
+        using: Optional[str] = None,
+        where: Optional[str] = None,
+        unique: bool = False
+    ) -> None:
+        """Создание индекса без блокировки записи в таблицу
+
+        Недостроенный (invalid) индекс, оставшийся после прерванной попытки,
+        удаляется и строится заново.
+        """
+        if self.connection is not None:
+            raise MigrationError("CREATE INDEX CONCURRENTLY requires transactional = False")
+        is_valid = self.execute("""
+            SELECT i.indisvalid
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name
+        """, {"name": name}).scalar()
+        if is_valid:
+            return
+        if is_valid is False:
+            logger.warning("Dropping invalid index %s before rebuilding", name)
+            self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        self.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table}{f' USING {using}' if using else ''} ({columns})"
+            f"{f' WHERE {where}' if where else ''}"
+        )
+
+    def backfill(
+        self,
+        step: str,
+        table: str,
+        key: str,
+        set_sql: str,
+        where: str = "TRUE",
+        batch_size: int = 1000,
+        pause: float = 0.0
+    ) -> int:
+        """Пакетное заполнение UPDATE table SET set_sql по возрастанию целочисленного key
+
+        Каждая пачка коммитится отдельно вместе с контрольной точкой, поэтому
+        блокировки строк короткие, а прерванное заполнение продолжается с места
+        остановки. В set_sql и where таблица доступна под псевдонимом t.
+        Возвращает число обновленных строк за этот запуск.
+        """
+        if self.connection is not None:
+            raise MigrationError("Batched backfill requires transactional = False")
+        total = 0
+        with self.engine.connect() as connection:
+            last_key = connection.execute(text("""
+                SELECT last_key FROM schema_migration_progress
+                WHERE version = :version AND step = :step
+            """), {"version": self.version, "step": step}).scalar()
+            connection.commit()
+            while True:
+                keys = connection.execute(text(f"""
+                    WITH batch AS (
+                        SELECT {key} FROM {table} t
+                        WHERE ({where}) AND (CAST(:last_key AS BIGINT) IS NULL OR {key} > :last_key)
+                        ORDER BY {key}
+                        LIMIT :batch_size
+                    )
+                    UPDATE {table} t SET {set_sql}
+                    FROM batch WHERE t.{key} = batch.{key}
+                    RETURNING t.{key}
+                """), {"last_key": last_key, "batch_size": batch_size}).scalars().all()
+                if not keys:
+                    break
+                last_key = max(keys)
+                connection.execute(text("""
+                    INSERT INTO schema_migration_progress (version, step, last_key, updated_at)
+                    VALUES (:version, :step, :last_key, now())
+                    ON CONFLICT (version, step)
+                    DO UPDATE SET last_key = excluded.last_key, updated_at = now()
+                """), {"version": self.version, "step": step, "last_key": last_key})
+                connection.commit()
+                total += len(keys)
+                logger.info("Backfill %s/%s: %s rows (up to %s=%s)", self.version, step, total, key, last_key)
+                if pause:
+                    time.sleep(pause)
+        return total
+
+
+class MigrationRunner:
+    """Поиск и применение миграций"""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        if engine is None:
+            from app.database import get_engine
+            engine = get_engine()
+        self.engine = engine
+
+    def discover(self) -> List[Migration]:
+        """Все миграции из пакета versions по возрастанию версии"""
+        package = importlib.import_module(VERSIONS_PACKAGE)
+        migrations = []
+        for module_info in pkgutil.iter_modules(package.__path__):
+            match = _MODULE_NAME.match(module_info.name)
+            if not match:
+                continue
+            module = importlib.import_module(f"{VERSIONS_PACKAGE}.{module_info.name}")
+            migrations.append(Migration(int(match.group(1)), match.group(2), module))
+        migrations.sort(key=lambda migration: migration.version)
+        versions = [migration.version for migration in migrations]
+        if len(versions) != len(set(versions)):
+            raise MigrationError("Duplicate migration versions")
+        return migrations
+
+    def applied_versions(self) -> Dict[int, Any]:
+        self._ensure_tables()
+        with self.engine.connect() as connection:
+            rows = connection.execute(text("SELECT version, applied_at FROM schema_migrations"))
+            return {row.version: row.applied_at for row in rows}
+
+    def status(self) -> List[dict]:
+        applied = self.applied_versions()
+        return [
+            {
+                "version": migration.version,
+                "name": migration.name,
+                "transactional": migration.transactional,
+                "applied_at": applied.get(migration.version),
+            }
+            for migration in self.discover()
+        ]
+
+    def pending(self) -> List[Migration]:
+        applied = self.applied_versions()
+        return [migration for migration in self.discover() if migration.version not in applied]
+
+    def upgrade(self, target: Optional[int] = None) -> List[Migration]:
+        """Применение ожидающих миграций (до target включительно)"""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_connection:
+            lock_connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+            try:
+                applied = []
+                for migration in self.pending():
+                    if target is not None and migration.version > target:
+                        break
+                    self._apply(migration)
+                    applied.append(migration)
+                return applied
+            finally:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+
+    def _apply(self, migration: Migration) -> None:
+        logger.info("Applying migration %04d_%s", migration.version, migration.name)
+        started = time.perf_counter()
+        if migration.transactional:
+            with self.engine.begin() as connection:
+                # DDL на нагруженной таблице не должен долго ждать блокировку и копить очередь
+                connection.execute(text(f"SET LOCAL lock_timeout = '{settings.migration_lock_timeout}'"))
+                migration.module.upgrade(MigrationContext(self.engine, migration.version, connection))
+                self._record(connection, migration)
+        else:
+            migration.module.upgrade(MigrationContext(self.engine, migration.version))
+            with self.engine.begin() as connection:
+                self._record(connection, migration)
+        logger.info(
+            "Migration %04d_%s applied in %.2fs",
+            migration.version, migration.name, time.perf_counter() - started
+        )
+
+    def _record(self, connection: Connection, migration: Migration) -> None:
+        connection.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+            {"version": migration.version, "name": migration.name}
+        )
+
+    def _ensure_tables(self) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(200) NOT NULL,
+                    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+                )
+            """))
+            connection.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migration_progress (
+                    version INTEGER NOT NULL,
+                    step VARCHAR(100) NOT NULL,
+                    last_key BIGINT,
+                    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+                    PRIMARY KEY (version, step)
+                )
+            """))
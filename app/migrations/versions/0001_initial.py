@@ -0,0 +1,50 @@
+"""Исходная схема: пользователи, посты, бронирования, комментарии"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id SERIAL PRIMARY KEY,
+            full_name VARCHAR(40) NOT NULL,
+            email VARCHAR(40) NOT NULL,
+            password_hash VARCHAR(200),
+            avatar_url VARCHAR(200),
+            create_timestamp TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    ctx.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)")
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_users_user_id ON users (user_id)")
+    
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS posts (
+            post_id SERIAL PRIMARY KEY,
+            text TEXT NOT NULL,
+            title VARCHAR(70) NOT NULL,
+            tags VARCHAR[] NOT NULL,
+            views_count INTEGER,
+            image_url VARCHAR(300),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_posts_post_id ON posts (post_id)")
+    
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS posts_users (
+            post_id INTEGER NOT NULL REFERENCES posts (post_id),
+            user_id INTEGER NOT NULL REFERENCES users (user_id),
+            PRIMARY KEY (post_id, user_id)
+        )
+    """)
+    
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS comments (
+            comment_id SERIAL PRIMARY KEY,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            post_id INTEGER NOT NULL REFERENCES posts (post_id),
+            user_id INTEGER NOT NULL REFERENCES users (user_id)
+        )
+    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_comments_comment_id ON comments (comment_id)")
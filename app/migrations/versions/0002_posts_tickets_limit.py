@@ -0,0 +1,10 @@
+"""Ограничение числа билетов на событие"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        ALTER TABLE posts
+        ADD COLUMN IF NOT EXISTS tickets_limit INTEGER DEFAULT 100 NOT NULL
+    """)
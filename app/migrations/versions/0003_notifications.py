@@ -0,0 +1,26 @@
+"""Outbox уведомлений"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS notifications (
+            notification_id SERIAL PRIMARY KEY,
+            kind VARCHAR(40) NOT NULL,
+            payload JSON NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            attempts INTEGER NOT NULL,
+            last_error TEXT,
+            next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            sent_at TIMESTAMP WITH TIME ZONE,
+            user_id INTEGER NOT NULL REFERENCES users (user_id),
+            post_id INTEGER REFERENCES posts (post_id)
+        )
+    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_notifications_notification_id ON notifications (notification_id)")
+    ctx.execute("""
+        CREATE INDEX IF NOT EXISTS ix_notifications_status_next_attempt
+        ON notifications (status, next_attempt_at)
+    """)
@@ -0,0 +1,8 @@
+"""Индексы билетов пользователя и ленты комментариев"""
+
+transactional = False
+
+
+def upgrade(ctx):
+    ctx.create_index_concurrently("ix_posts_users_user_id", "posts_users", "user_id")
+    ctx.create_index_concurrently("ix_comments_post_id_created_at", "comments", "post_id, created_at")
@@ -0,0 +1,15 @@
+"""Денормализованная активность комментариев на постах
+
+Колонки с константным значением по умолчанию добавляются без перезаписи таблицы.
+"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        ALTER TABLE posts
+        ADD COLUMN IF NOT EXISTS comment_count INTEGER DEFAULT 0 NOT NULL,
+        ADD COLUMN IF NOT EXISTS last_comment_at TIMESTAMP WITH TIME ZONE,
+        ADD COLUMN IF NOT EXISTS last_comment_preview VARCHAR(140)
+    """)
@@ -0,0 +1,26 @@
+"""Заполнение активности комментариев пачками по post_id
+
+Подзапросы используют индекс ix_comments_post_id_created_at из 0004.
+"""
+
+transactional = False
+
+
+def upgrade(ctx):
+    ctx.backfill(
+        step="comment_stats",
+        table="posts",
+        key="post_id",
+        set_sql="""
+            comment_count = (SELECT count(*) FROM comments c WHERE c.post_id = t.post_id),
+            last_comment_at = (SELECT max(c.created_at) FROM comments c WHERE c.post_id = t.post_id),
+            last_comment_preview = (
+                SELECT left(c.text, 140) FROM comments c
+                WHERE c.post_id = t.post_id
+                ORDER BY c.created_at DESC, c.comment_id DESC
+                LIMIT 1
+            )
+        """,
+        where="EXISTS (SELECT 1 FROM comments c WHERE c.post_id = t.post_id)",
+        batch_size=500
+    )
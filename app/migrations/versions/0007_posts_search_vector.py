@@ -0,0 +1,31 @@
+"""Колонка полнотекстового поиска
+
+Обычная nullable-колонка добавляется без перезаписи таблицы posts (только
+изменение каталога); новые и измененные строки заполняет триггер. Существующие
+строки заполняются пачками в 0008 перед построением индекса.
+"""
+from app.models.post import SEARCH_VECTOR_EXPRESSION
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    ctx.execute(f"""
+        CREATE OR REPLACE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := (
+                SELECT {SEARCH_VECTOR_EXPRESSION}
+                FROM (SELECT NEW.title AS title, NEW.text AS text) AS posts
+            );
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    ctx.execute("DROP TRIGGER IF EXISTS posts_search_vector_update ON posts")
+    # UPDATE OF: счетчики просмотров и комментариев не пересчитывают вектор
+    ctx.execute("""
+        CREATE TRIGGER posts_search_vector_update
+        BEFORE INSERT OR UPDATE OF title, text ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+    """)
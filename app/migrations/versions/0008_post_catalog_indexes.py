@@ -0,0 +1,24 @@
+"""Индексы поиска, фильтрации и импорта постов
+
+Перед индексом поиска пачками заполняется search_vector строк, добавленных
+до триггера из 0007.
+"""
+from app.models.post import SEARCH_VECTOR_EXPRESSION
+
+transactional = False
+
+
+def upgrade(ctx):
+    ctx.backfill(
+        step="search_vector",
+        table="posts",
+        key="post_id",
+        set_sql=f"search_vector = {SEARCH_VECTOR_EXPRESSION}",
+        where="t.search_vector IS NULL",
+        batch_size=1000
+    )
+    ctx.create_index_concurrently("ix_posts_search_vector", "posts", "search_vector", using="gin")
+    ctx.create_index_concurrently("ix_posts_tags", "posts", "tags", using="gin")
+    ctx.create_index_concurrently("ix_posts_created_at", "posts", "created_at")
+    ctx.create_index_concurrently("ix_posts_views_count", "posts", "views_count DESC NULLS LAST, post_id DESC")
+    ctx.create_index_concurrently("ix_posts_title", "posts", "title")
@@ -0,0 +1,17 @@
+"""Корзины активности постов для рейтинга популярности"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS post_activity (
+            post_id INTEGER NOT NULL REFERENCES posts (post_id),
+            bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+            views INTEGER NOT NULL,
+            bookings INTEGER NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (post_id, bucket_start)
+        )
+    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_post_activity_updated_at ON post_activity (updated_at)")
@@ -0,0 +1,27 @@
+"""Время бронирования, дата события и архив бронирований
+
+now() вычисляется один раз при ALTER, поэтому booked_at добавляется без
+перезаписи posts_users (существующим строкам достается время миграции).
+"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        ALTER TABLE posts_users
+        ADD COLUMN IF NOT EXISTS booked_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+    """)
+    ctx.execute("ALTER TABLE posts ADD COLUMN IF NOT EXISTS event_at TIMESTAMP WITH TIME ZONE")
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS posts_users_archive (
+            post_id INTEGER NOT NULL REFERENCES posts (post_id),
+            user_id INTEGER NOT NULL REFERENCES users (user_id),
+            booked_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (post_id, user_id)
+        )
+    """)
+    ctx.execute(
+        "CREATE INDEX IF NOT EXISTS ix_posts_users_archive_user_id ON posts_users_archive (user_id)"
+    )
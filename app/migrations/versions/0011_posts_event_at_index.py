@@ -0,0 +1,9 @@
+"""Индекс по дате события для поиска завершившихся событий"""
+
+transactional = False
+
+
+def upgrade(ctx):
+    ctx.create_index_concurrently(
+        "ix_posts_event_at", "posts", "event_at", where="event_at IS NOT NULL"
+    )
@@ -0,0 +1,18 @@
+"""Idempotency-Key бронирования и отмены, общие для всех процессов"""
+
+transactional = True
+
+
+def upgrade(ctx):
+    ctx.execute("""
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+            key VARCHAR(200) NOT NULL,
+            fingerprint VARCHAR(64) NOT NULL,
+            status_code INTEGER,
+            body JSON,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (user_id, key)
+        )
+    """)
+    ctx.execute("CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys (created_at)")
@@ -0,0 +1,9 @@
+"""
+Версии миграций
+
+Файл NNNN_name.py определяет функцию upgrade(ctx) и флаг transactional.
+Транзакционная миграция выполняется целиком в одной транзакции вместе с
+записью версии. Нетранзакционная (transactional = False) нужна для
+CREATE INDEX CONCURRENTLY и пакетных заполнений; ее шаги должны быть
+идемпотентными, так как после сбоя она запускается повторно.
+"""
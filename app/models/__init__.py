@@ -5,7 +5,11 @@ SQLAlchemy модели
 """
 
 from .user import User
-from .post import Post, posts_users
+from .post import Post, posts_users, posts_users_archive
 from .comment import Comment
+from .notification import Notification
+from .activity import PostActivity
+from .token import RevokedToken
+from .idempotency import IdempotencyKey
 
-__all__ = ["User", "Post", "posts_users", "Comment"]
\ No newline at end of file
+__all__ = ["User", "Post", "posts_users", "posts_users_archive", "Comment", "Notification", "PostActivity", "RevokedToken", "IdempotencyKey"]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class PostActivity(Base):
+    """Агрегаты просмотров и бронирований поста по временным корзинам"""
+    __tablename__ = "post_activity"
+    
+    post_id = Column(Integer, ForeignKey("posts.post_id"), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    bookings = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Инкрементальный пересчет читает только корзины, измененные с прошлого запуска
+        Index("ix_post_activity_updated_at", "updated_at"),
+    )
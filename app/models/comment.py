@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,3 +18,8 @@ class Comment(Base):
     # Relationships
     post = relationship("Post", back_populates="comments")
     user = relationship("User", back_populates="comments")
+    
+    __table_args__ = (
+        # Лента комментариев поста: фильтр по post_id и сортировка по времени
+        Index("ix_comments_post_id_created_at", "post_id", "created_at"),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """Idempotency-Key пользователя и сохраненный ответ на первый запрос
+
+    Пишется в транзакции бронирования/отмены, поэтому видна всем процессам
+    ровно тогда, когда видно само изменение.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(200), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)  # None — ответ еще не сохранен
+    body = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Удаление истекших ключей
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
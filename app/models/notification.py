@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Notification(Base):
+    """Уведомление в outbox: пишется в транзакции бронирования, доставляется фоном"""
+    __tablename__ = "notifications"
+    
+    notification_id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(40), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="pending")  # pending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Foreign keys
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
+    post_id = Column(Integer, ForeignKey("posts.post_id"), nullable=True)
+    
+    # Relationships
+    user = relationship("User")
+    
+    __table_args__ = (
+        # Диспетчер выбирает готовые к отправке записи по (status, next_attempt_at)
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ARRAY, ForeignKey, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Text, ARRAY, ForeignKey, Table, Index, FetchedValue
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 
 
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+)
+
+
 class Post(Base):
     __tablename__ = "posts"
     
@@ -15,12 +22,40 @@ class Post(Base):
     image_url = Column(String(300), nullable=True)
     tickets_limit = Column(Integer, default=100, nullable=False)  # Ограничение билетов
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Дата события; бронирования прошедших событий переносятся в архив
+    event_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Денормализованная активность комментариев (обновляется в app/crud/comment.py)
+    comment_count = Column(Integer, default=0, server_default="0", nullable=False)
+    last_comment_at = Column(DateTime(timezone=True), nullable=True)
+    last_comment_preview = Column(String(140), nullable=True)
+    
+    # Полнотекстовый индекс (русская морфология); заполняется триггером
+    # posts_search_vector_update по SEARCH_VECTOR_EXPRESSION (миграция 0007)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        nullable=True,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue()
+    ))
     
     # Relationship to users through association table
     users = relationship("User", secondary="posts_users", back_populates="posts")
     
     # Relationship to comments
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("ix_posts_search_vector", "search_vector", postgresql_using="gin"),
+        # Фильтрация по тегам (&&, @>) и сортировки каталога
+        Index("ix_posts_tags", "tags", postgresql_using="gin"),
+        Index("ix_posts_created_at", "created_at"),
+        # Совпадает с сортировкой popular (views_count DESC NULLS LAST, post_id DESC)
+        Index("ix_posts_views_count", views_count.desc().nulls_last(), post_id.desc()),
+        # Дедупликация при массовом импорте по названию
+        Index("ix_posts_title", "title"),
+        Index("ix_posts_event_at", "event_at", postgresql_where=event_at.isnot(None)),
+    )
 
 
 # Association table for many-to-many relationship between users and posts
@@ -28,5 +63,19 @@ posts_users = Table(
     'posts_users',
     Base.metadata,
     Column('post_id', Integer, ForeignKey('posts.post_id'), primary_key=True),
-    Column('user_id', Integer, ForeignKey('users.user_id'), primary_key=True)
+    Column('user_id', Integer, ForeignKey('users.user_id'), primary_key=True),
+    Column('booked_at', DateTime(timezone=True), server_default=func.now(), nullable=False),
+    # PK (post_id, user_id) не покрывает выборку билетов по пользователю
+    Index('ix_posts_users_user_id', 'user_id')
+)
+
+# Холодное хранилище: бронирования завершившихся событий (см. archive_past_bookings)
+posts_users_archive = Table(
+    'posts_users_archive',
+    Base.metadata,
+    Column('post_id', Integer, ForeignKey('posts.post_id'), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.user_id'), primary_key=True),
+    Column('booked_at', DateTime(timezone=True), nullable=False),
+    Column('archived_at', DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Index('ix_posts_users_archive_user_id', 'user_id')
 )
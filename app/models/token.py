@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """Отозванный JWT (по jti); запись нужна только до истечения токена"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        # Инкрементальная синхронизация в процессы и очистка истекших
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
@@ -5,13 +5,19 @@ Pydantic схемы
 """
 
 from .user import User, UserCreate, UserLogin, UserResponse, UserWithToken
-from .post import Post, PostCreate, PostResponse, TicketBooking, TicketBookingResponse, PostWithAvailability
-from .auth import Token, TokenData
+from .post import (
+    Post, PostCreate, PostResponse, TicketBooking, TicketBookingResponse, PostWithAvailability,
+    PostSearchResult, PostSearchPage, TagFacet, PostFilterPage,
+    TrendingPost, TrendingTag, ArchivedTicket
+)
+from .auth import Token, TokenData, TokenRefresh, TokenPair, Logout
 from .comment import Comment, CommentCreate, CommentUpdate, CommentWithUser
 
 __all__ = [
     "User", "UserCreate", "UserLogin", "UserResponse", "UserWithToken",
     "Post", "PostCreate", "PostResponse", "TicketBooking", "TicketBookingResponse", "PostWithAvailability",
-    "Token", "TokenData",
+    "PostSearchResult", "PostSearchPage", "TagFacet", "PostFilterPage",
+    "TrendingPost", "TrendingTag", "ArchivedTicket",
+    "Token", "TokenData", "TokenRefresh", "TokenPair", "Logout",
     "Comment", "CommentCreate", "CommentUpdate", "CommentWithUser"
 ]
\ No newline at end of file
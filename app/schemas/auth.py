@@ -9,3 +9,16 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     user_id: Optional[int] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
+class TokenPair(BaseModel):
+    token: str
+    refresh_token: str
+
+
+class Logout(BaseModel):
+    refresh_token: Optional[str] = None
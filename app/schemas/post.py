@@ -1,14 +1,15 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
 
 class PostBase(BaseModel):
-    title: str
+    title: str = Field(..., max_length=70)
     text: str
     tags: List[str] = []
-    image_url: Optional[str] = None
+    image_url: Optional[str] = Field(None, max_length=300)
     tickets_limit: int = 100
+    event_at: Optional[datetime] = None
 
 
 class PostCreate(PostBase):
@@ -19,6 +20,9 @@ class Post(PostBase):
     post_id: int
     views_count: int
     created_at: datetime
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None
+    last_comment_preview: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -31,6 +35,11 @@ class PostResponse(Post):
     is_booked_by_user: bool = False
 
 
+class ArchivedTicket(PostResponse):
+    """Билет на завершившееся событие"""
+    booked_at: datetime
+
+
 class TicketBooking(BaseModel):
     post_id: int
 
@@ -48,3 +57,51 @@ class PostWithAvailability(Post):
     tickets_available: int
     tickets_booked: int
     is_available: bool
+
+
+class PostSearchResult(BaseModel):
+    """Результат полнотекстового поиска с подсветкой совпадений"""
+    post_id: int
+    title: str
+    tags: List[str] = []
+    views_count: int
+    image_url: Optional[str] = None
+    tickets_limit: int
+    created_at: datetime
+    tickets_available: int
+    tickets_booked: int
+    is_available: bool
+    rank: float
+    title_highlight: str
+    text_highlight: str
+
+
+class PostSearchPage(BaseModel):
+    """Страница результатов поиска; next_cursor передается для следующей страницы"""
+    items: List[PostSearchResult]
+    next_cursor: Optional[str] = None
+
+
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+
+class PostFilterPage(BaseModel):
+    """Страница отфильтрованных постов с фасетами по тегам"""
+    items: List[PostResponse]
+    total: int
+    facets: List[TagFacet]
+
+
+class TrendingPost(BaseModel):
+    post_id: int
+    title: str
+    image_url: Optional[str] = None
+    tags: List[str] = []
+    score: float
+
+
+class TrendingTag(BaseModel):
+    tag: str
+    score: float
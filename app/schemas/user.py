@@ -32,3 +32,4 @@ class UserResponse(User):
 
 class UserWithToken(User):
     token: str
+    refresh_token: Optional[str] = None
@@ -5,5 +5,6 @@
 """
 
 from .ticket_service import TicketService
+from .notifications import NotificationDispatcher, NotificationTransport, register_transport
 
-__all__ = ["TicketService"]
+__all__ = ["TicketService", "NotificationDispatcher", "NotificationTransport", "register_transport"]
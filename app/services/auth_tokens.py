@@ -0,0 +1,62 @@
+"""
+Выдача и отзыв токенов
+
+Пара access/refresh выдается при входе; refresh-токен одноразовый (при
+обновлении старый отзывается). Отзывы пишутся в revoked_tokens и
+периодически подтягиваются в память каждого процесса, поэтому проверка
+токена на запросе не обращается к БД. Истекшие отзывы удаляет из БД
+отдельная задача планировщика в процессе-лидере.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.security import (
+    TokenClaims, create_access_token, create_refresh_token, revoked_tokens
+)
+from app.crud.token import revoke_token, get_revocations_since
+
+# Запас при инкрементальной синхронизации (отзывы из параллельных транзакций)
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def issue_token_pair(user_id: int) -> dict:
+    """Новая пара токенов пользователя"""
+    return {
+        "token": create_access_token({"user_id": user_id}),
+        "refresh_token": create_refresh_token(user_id)
+    }
+
+
+def revoke(db: Session, claims: TokenClaims) -> bool:
+    """Отзыв токена: в БД для всех процессов и сразу в памяти текущего
+
+    Возвращает False, если токен уже был отозван (в том числе параллельным
+    запросом в другом процессе) — так refresh-токен используется один раз.
+    """
+    if claims.jti is None:
+        return False
+    revoked = revoke_token(db, claims.jti, datetime.fromtimestamp(claims.exp, tz=timezone.utc))
+    revoked_tokens.add(claims.jti, claims.exp)
+    return revoked
+
+
+class RevocationSyncer:
+    """Инкрементальная загрузка отзывов из БД в revoked_tokens"""
+
+    def __init__(self):
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def sync(self, db: Session) -> int:
+        """Загрузка новых отзывов; возвращает число загруженных"""
+        with self._lock:
+            since = self._synced_at - SYNC_OVERLAP if self._synced_at else None
+            rows, synced_at = get_revocations_since(db, since)
+            revoked_tokens.update((jti, expires_at.timestamp()) for jti, expires_at in rows)
+            revoked_tokens.prune()
+            self._synced_at = synced_at
+            return len(rows)
+
+
+revocation_syncer = RevocationSyncer()
@@ -0,0 +1,73 @@
+"""
+Чтение каталога с объединением одинаковых запросов
+
+Во время старта продаж множество клиентов одновременно запрашивают одну и ту
+же страницу каталога и доступность одного события. Одинаковые параллельные
+запросы выполняют один SQL-запрос (single-flight), результат переиспользуется
+в течение settings.coalesce_window секунд. Каждый получатель получает свою
+копию строк, так как дальше они дополняются данными пользователя.
+
+Популярные теги (агрегат по всем постам) пересчитываются задачей планировщика,
+эндпоинт отдает готовый список из памяти.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import FrozenSet, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
+from app.crud.post import get_posts_with_availability, get_tickets_availability, get_last_tags
+
+# Сколько популярных тегов держать в памяти
+POPULAR_TAGS_SIZE = 100
+
+posts_page_flight = SingleFlight("posts_page", window=settings.coalesce_window)
+availability_flight = SingleFlight("availability", window=settings.coalesce_window)
+
+
+def get_posts_page(
+    db: Session, skip: int = 0, limit: int = 100, fields: Optional[FrozenSet[str]] = None
+) -> List[dict]:
+    """Страница каталога с доступностью билетов (без отметок пользователя)"""
+    if not settings.coalescing_enabled:
+        return get_posts_with_availability(db, skip=skip, limit=limit, fields=fields)
+    posts = posts_page_flight.do(
+        (skip, limit, fields), lambda: get_posts_with_availability(db, skip=skip, limit=limit, fields=fields)
+    )
+    return [dict(post) for post in posts]
+
+
+def get_availability(db: Session, post_id: int) -> dict:
+    """Доступность билетов события"""
+    if not settings.coalescing_enabled:
+        return get_tickets_availability(db, post_id)
+    return dict(availability_flight.do(post_id, lambda: get_tickets_availability(db, post_id)))
+
+
+class PopularTags:
+    """Популярные теги, пересчитываемые в фоне"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tags: Optional[List[str]] = None
+        self.computed_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session) -> int:
+        """Пересчет списка; возвращает число тегов"""
+        tags = get_last_tags(db, self.size)
+        with self._lock:
+            self.tags = tags
+            self.computed_at = datetime.now(timezone.utc)
+        return len(tags)
+
+    def get(self, db: Session, limit: int = 20) -> List[str]:
+        """Первые limit тегов; до первого пересчета считаются на запросе"""
+        if limit > self.size:
+            return get_last_tags(db, limit)
+        if self.tags is None:
+            self.refresh(db)
+        return self.tags[:limit]
+
+
+popular_tags = PopularTags(POPULAR_TAGS_SIZE)
@@ -0,0 +1,204 @@
+"""
+Доставка уведомлений из outbox
+
+Бронирование только записывает строку в таблицу notifications в своей транзакции,
+а пул фоновых потоков разбирает очередь пачками, соблюдая ограничение скорости
+и повторяя неудачные отправки. Способ доставки задается транспортом.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.notification import (
+    claim_pending_notifications, mark_notification_sent, mark_notification_failed
+)
+from app.models.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationTransport:
+    """Базовый транспорт доставки уведомлений"""
+
+    def send(self, notification: Notification) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _as_message(notification: Notification) -> dict:
+    return {
+        "notification_id": notification.notification_id,
+        "kind": notification.kind,
+        "user_id": notification.user_id,
+        "post_id": notification.post_id,
+        "payload": notification.payload,
+    }
+
+
+class StdoutTransport(NotificationTransport):
+    """Вывод уведомлений в stdout (для разработки)"""
+
+    def send(self, notification: Notification) -> None:
+        print(json.dumps(_as_message(notification), ensure_ascii=False), flush=True)
+
+
+class FileTransport(NotificationTransport):
+    """Запись уведомлений в локальный файл построчно в формате JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notification: Notification) -> None:
+        line = json.dumps(_as_message(notification), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_transports: Dict[str, Callable[[], NotificationTransport]] = {
+    "stdout": StdoutTransport,
+    "file": lambda: FileTransport(settings.notification_file_path),
+}
+
+
+def register_transport(name: str, factory: Callable[[], NotificationTransport]) -> None:
+    """Регистрация собственного транспорта (email, push и т.д.)"""
+    _transports[name] = factory
+
+
+def build_transport(name: Optional[str] = None) -> NotificationTransport:
+    """Создание транспорта по имени из настроек"""
+    name = name or settings.notification_transport
+    if name not in _transports:
+        raise ValueError(f"Unknown notification transport: {name}")
+    return _transports[name]()
+
+
+class RateLimiter:
+    """Token bucket, общий для всех потоков диспетчера"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: threading.Event) -> bool:
+        """Ожидание токена; False, если диспетчер останавливается"""
+        if self.rate <= 0:
+            return True
+        while not stop.is_set():
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            stop.wait(wait)
+        return False
+
+
+class NotificationDispatcher:
+    """Пул фоновых потоков, разбирающих outbox"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        transport: NotificationTransport,
+        workers: int = 2,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        retry_delay: float = 5.0,
+        rate_limit: float = 0
+    ):
+        self.session_factory = session_factory
+        self.transport = transport
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        """Запуск потоков диспетчера"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"notification-dispatcher-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Остановка потоков (текущая пачка дорабатывается)"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.transport.close()
+
+    def run_once(self) -> int:
+        """Обработка одной пачки; возвращает число обработанных уведомлений"""
+        db = self.session_factory()
+        try:
+            batch = claim_pending_notifications(db, self.batch_size)
+            processed = 0
+            for notification in batch:
+                if not self.rate_limiter.acquire(self._stop):
+                    break  # Остаток пачки разблокируется откатом и будет взят позже
+                try:
+                    self.transport.send(notification)
+                except Exception as e:
+                    logger.warning("Notification %s delivery failed: %s", notification.notification_id, e)
+                    mark_notification_failed(
+                        db, notification, str(e), self.max_attempts, self.retry_delay
+                    )
+                else:
+                    mark_notification_sent(db, notification)
+                processed += 1
+            db.commit()
+            return processed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception:
+                logger.exception("Notification dispatcher error")
+                processed = 0
+            if processed < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+
+def create_dispatcher(session_factory: Callable[[], Session]) -> NotificationDispatcher:
+    """Создание диспетчера по настройкам приложения"""
+    return NotificationDispatcher(
+        session_factory=session_factory,
+        transport=build_transport(),
+        workers=settings.notification_workers,
+        batch_size=settings.notification_batch_size,
+        poll_interval=settings.notification_poll_interval,
+        max_attempts=settings.notification_max_attempts,
+        retry_delay=settings.notification_retry_delay,
+        rate_limit=settings.notification_rate_limit
+    )
@@ -0,0 +1,157 @@
+"""
+Массовый импорт и экспорт постов
+
+Импорт читает NDJSON/CSV потоково, проверяет записи пачками схемой PostCreate,
+загружает их через COPY во временную таблицу и одним INSERT ... SELECT
+переносит в posts, отбрасывая дубликаты по названию (внутри файла и с уже
+существующими постами). Экспорт отдает каталог потоково через серверный курсор.
+"""
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from app.crud.bulk import copy_rows, format_pg_array
+from app.models.post import Post
+from app.schemas.post import PostCreate
+
+FORMATS = ("ndjson", "csv")
+IMPORT_COLUMNS = ["line", "title", "text", "tags", "image_url", "tickets_limit", "event_at"]
+EXPORT_COLUMNS = [
+    "post_id", "title", "text", "tags", "image_url", "tickets_limit", "views_count", "created_at", "event_at"
+]
+# Разделитель тегов в CSV
+CSV_TAGS_SEPARATOR = ";"
+MAX_REPORTED_ERRORS = 100
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Чтение записей (номер строки, данные) из NDJSON или CSV"""
+    if fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, e
+    elif fmt == "csv":
+        # Строка 1 — заголовок
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            tags = row.get("tags") or ""
+            row["tags"] = [tag.strip() for tag in tags.split(CSV_TAGS_SEPARATOR) if tag.strip()]
+            if not row.get("image_url"):
+                row["image_url"] = None
+            if not row.get("tickets_limit"):
+                row.pop("tickets_limit", None)
+            if not row.get("event_at"):
+                row["event_at"] = None
+            yield line_number, row
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _validate_batch(batch: List[Tuple[int, Any]], errors: List[dict]) -> List[tuple]:
+    rows = []
+    for line_number, record in batch:
+        if isinstance(record, Exception):
+            errors.append({"line": line_number, "error": str(record)})
+            continue
+        try:
+            post = PostCreate.model_validate(record)
+        except ValidationError as e:
+            errors.append({"line": line_number, "error": e.errors(include_url=False, include_input=False, include_context=False)})
+            continue
+        rows.append((
+            line_number, post.title, post.text, format_pg_array(post.tags),
+            post.image_url, post.tickets_limit, post.event_at
+        ))
+    return rows
+
+
+def import_posts(db: Session, records: Iterable[Tuple[int, Any]], batch_size: int = 1000) -> Dict[str, Any]:
+    """Импорт постов одной транзакцией; возвращает статистику и ошибки валидации"""
+    db.execute(text("""
+        CREATE TEMP TABLE posts_import (
+            line INTEGER NOT NULL,
+            title VARCHAR(70) NOT NULL,
+            text TEXT NOT NULL,
+            tags VARCHAR[] NOT NULL,
+            image_url VARCHAR(300),
+            tickets_limit INTEGER NOT NULL,
+            event_at TIMESTAMP WITH TIME ZONE
+        ) ON COMMIT DROP
+    """))
+
+    received = 0
+    valid = 0
+    errors: List[dict] = []
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        received += len(batch)
+        valid += copy_rows(db, "posts_import", IMPORT_COLUMNS, _validate_batch(batch, errors))
+
+    # Дедупликация на стороне БД: первая запись с названием из файла, если такого поста еще нет
+    inserted = db.execute(text("""
+        INSERT INTO posts (title, text, tags, image_url, tickets_limit, event_at, views_count)
+        SELECT DISTINCT ON (i.title) i.title, i.text, i.tags, i.image_url, i.tickets_limit, i.event_at, 0
+        FROM posts_import i
+        WHERE NOT EXISTS (SELECT 1 FROM posts p WHERE p.title = i.title)
+        ORDER BY i.title, i.line
+    """)).rowcount
+    db.commit()
+
+    return {
+        "received": received,
+        "valid": valid,
+        "invalid": len(errors),
+        "duplicates": valid - inserted,
+        "inserted": inserted,
+        "errors": errors[:MAX_REPORTED_ERRORS]
+    }
+
+
+def export_posts(db: Session, fmt: str, batch_size: int = 1000) -> Iterator[str]:
+    """Потоковая выгрузка постов в NDJSON или CSV (пачками через серверный курсор)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    stmt = (
+        select(*(getattr(Post, column) for column in EXPORT_COLUMNS))
+        .order_by(Post.post_id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = db.execute(stmt)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for rows in result.partitions():
+            for row in rows:
+                writer.writerow([
+                    row.post_id, row.title, row.text, CSV_TAGS_SEPARATOR.join(row.tags or []),
+                    row.image_url, row.tickets_limit, row.views_count, row.created_at.isoformat(),
+                    row.event_at.isoformat() if row.event_at else None
+                ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for rows in result.partitions():
+            yield "".join(
+                json.dumps({
+                    **row._asdict(),
+                    "created_at": row.created_at.isoformat(),
+                    "event_at": row.event_at.isoformat() if row.event_at else None
+                }, ensure_ascii=False) + "\n"
+                for row in rows
+            )
@@ -6,9 +6,11 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.crud.post import (
-    get_post, book_ticket, cancel_ticket, get_user_tickets,
-    get_posts_by_tag, get_last_tags
+    get_post, book_ticket, cancel_ticket, get_user_tickets_with_availability,
+    get_posts_by_tag, get_last_tags, invalidate_user_bookings, is_past_event
 )
+from app.crud.notification import enqueue_notification
+from app.services.trending import trending_recorder
 from app.models.post import Post
 from app.models.user import User
 from app.schemas.post import PostResponse, TicketBookingResponse
@@ -47,6 +49,12 @@ class TicketService:
                 "error": "Post not found",
                 "error_code": "POST_NOT_FOUND"
             }
+        if is_past_event(post.event_at):
+            return {
+                "success": False,
+                "error": "Event has already taken place",
+                "error_code": "EVENT_PASSED"
+            }
         
         # 2. Проверяем доступность (если требуется)
         if check_availability:
@@ -58,8 +66,8 @@ class TicketService:
                     "error_code": "SOLD_OUT"
                 }
         
-        # 3. Пытаемся забронировать
-        success = book_ticket(self.db, post_id, user_id)
+        # 3. Пытаемся забронировать (коммит — после записи уведомления)
+        success = book_ticket(self.db, post_id, user_id, commit=False)
         if not success:
             return {
                 "success": False,
@@ -67,9 +75,12 @@ class TicketService:
                 "error_code": "ALREADY_BOOKED"
             }
         
-        # 4. Отправляем уведомление (если требуется)
+        # 4. Ставим уведомление в outbox в той же транзакции (если требуется)
         if send_notification:
             self._send_booking_notification(user_id, post)
+        self.db.commit()
+        invalidate_user_bookings(user_id)
+        trending_recorder.record_booking(post_id)
         
         # 5. Возвращаем успешный результат
         return {
@@ -117,22 +128,16 @@ class TicketService:
         """
         Получение билетов пользователя с дополнительной информацией
         """
-        tickets = get_user_tickets(self.db, user_id)
+        # Один запрос: нужные колонки (без text) и число бронирований
+        tickets = get_user_tickets_with_availability(self.db, user_id, include_text=False)
         
         # Добавляем дополнительную информацию
         ticket_details = []
         for ticket in tickets:
-            ticket_info = {
-                "post_id": ticket.post_id,
-                "title": ticket.title,
-                "created_at": ticket.created_at,
-                "views_count": ticket.views_count,
-                "tags": ticket.tags,
-                "image_url": ticket.image_url,
-                # Можно добавить статус, дату события и т.д.
-                "status": "active"  # Пример
-            }
-            ticket_details.append(ticket_info)
+            ticket.pop("is_booked_by_user")
+            # Можно добавить статус, дату события и т.д.
+            ticket["status"] = "active"  # Пример
+            ticket_details.append(ticket)
         
         return {
             "success": True,
@@ -169,10 +174,22 @@ class TicketService:
     
     def _send_booking_notification(self, user_id: int, post: Post) -> None:
         """
-        Отправка уведомления о бронировании (заглушка)
+        Постановка уведомления о бронировании в outbox
+        
+        Доставкой занимается NotificationDispatcher в фоне,
+        поэтому время бронирования от нее не зависит.
         """
-        # Здесь можно добавить логику отправки email, push-уведомлений и т.д.
-        print(f"Notification sent to user {user_id} about booking {post.title}")
+        enqueue_notification(
+            self.db,
+            user_id=user_id,
+            kind="booking_created",
+            payload={
+                "post_id": post.post_id,
+                "title": post.title,
+                "message": f"Ticket booked: {post.title}"
+            },
+            post_id=post.post_id
+        )
     
     def get_popular_tags_with_stats(self, limit: int = 10) -> Dict[str, Any]:
         """
@@ -0,0 +1,227 @@
+"""
+Популярные сейчас события
+
+Просмотры и бронирования копятся в памяти и записываются в post_activity
+по часовым (настраиваемым) корзинам. Фоновый пересчет читает только корзины,
+измененные с прошлого запуска, и обновляет затухающие оценки постов и тегов;
+эндпоинты отдают готовый top-K из памяти.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.activity import PostActivity
+from app.models.post import Post
+
+# Оценки ниже порога считаются нулевыми и удаляются из памяти
+MIN_SCORE = 1e-3
+# Запас при чтении измененных корзин: повторное чтение безопасно (учитываются только приращения)
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def _bucket_start(ts: float, bucket_seconds: int) -> datetime:
+    return datetime.fromtimestamp(ts - ts % bucket_seconds, tz=timezone.utc)
+
+
+class TrendingRecorder:
+    """Буфер событий просмотра и бронирования"""
+
+    def __init__(self, bucket_seconds: int, enabled: bool = True):
+        self.bucket_seconds = bucket_seconds
+        # Выключенный буфер ничего не копит: без задачи сброса события не уходят в БД
+        self.enabled = enabled
+        self._pending: Dict[Tuple[int, datetime], List[int]] = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+
+    def record_view(self, post_id: int) -> None:
+        self._record(post_id, 0)
+
+    def record_booking(self, post_id: int) -> None:
+        self._record(post_id, 1)
+
+    def _record(self, post_id: int, index: int) -> None:
+        if not self.enabled:
+            return
+        key = (post_id, _bucket_start(time.time(), self.bucket_seconds))
+        with self._lock:
+            self._pending[key][index] += 1
+
+    def flush(self, db: Session) -> int:
+        """Запись накопленных событий одним INSERT ... ON CONFLICT DO UPDATE"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: [0, 0])
+        if not pending:
+            return 0
+
+        rows = [
+            {"post_id": post_id, "bucket_start": bucket, "views": views, "bookings": bookings}
+            for (post_id, bucket), (views, bookings) in pending.items()
+        ]
+        stmt = insert(PostActivity).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PostActivity.post_id, PostActivity.bucket_start],
+            set_={
+                "views": PostActivity.views + stmt.excluded.views,
+                "bookings": PostActivity.bookings + stmt.excluded.bookings,
+                "updated_at": func.now(),
+            }
+        )
+        try:
+            db.execute(stmt)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, (views, bookings) in pending.items():
+                    self._pending[key][0] += views
+                    self._pending[key][1] += bookings
+            raise
+        return len(rows)
+
+
+class TrendingRanker:
+    """Затухающие оценки популярности постов и тегов
+
+    score(t) = Σ (views·w_v + bookings·w_b) · exp(-λ·age); при пересчете
+    старые оценки домножаются на exp(-λ·Δt) и к ним добавляются только
+    приращения корзин, поэтому стоимость пропорциональна новой активности.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int,
+        half_life_seconds: float,
+        window_seconds: float,
+        view_weight: float,
+        booking_weight: float,
+        top_k: int
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.decay_rate = math.log(2) / half_life_seconds
+        self.window_seconds = window_seconds
+        self.view_weight = view_weight
+        self.booking_weight = booking_weight
+        self.top_k = top_k
+
+        self._scores: Dict[int, float] = {}
+        self._scored_at: Optional[float] = None
+        self._seen: Dict[Tuple[int, datetime], Tuple[int, int]] = {}
+        self._synced_at: Optional[datetime] = None
+        self._post_tags: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+
+        # Готовые результаты для эндпоинтов (заменяются целиком)
+        self.top_posts: List[dict] = []
+        self.top_tags: List[dict] = []
+        self.computed_at: Optional[datetime] = None
+
+    def recompute(self, db: Session) -> int:
+        """Инкрементальный пересчет; возвращает число прочитанных корзин"""
+        with self._lock:
+            return self._recompute(db)
+
+    def _recompute(self, db: Session) -> int:
+        now = time.time()
+        now_dt = datetime.fromtimestamp(now, tz=timezone.utc)
+        window_start = now_dt - timedelta(seconds=self.window_seconds)
+        since = max(self._synced_at - SYNC_OVERLAP, window_start) if self._synced_at else window_start
+        synced_at = db.execute(select(func.now())).scalar()
+
+        rows = db.execute(
+            select(
+                PostActivity.post_id, PostActivity.bucket_start,
+                PostActivity.views, PostActivity.bookings
+            ).where(
+                PostActivity.updated_at >= since,
+                PostActivity.bucket_start >= window_start
+            )
+        ).all()
+
+        # Затухание накопленных оценок до текущего момента
+        if self._scored_at is not None:
+            factor = math.exp(-self.decay_rate * (now - self._scored_at))
+            for post_id in self._scores:
+                self._scores[post_id] *= factor
+        self._scored_at = now
+
+        for row in rows:
+            key = (row.post_id, row.bucket_start)
+            seen_views, seen_bookings = self._seen.get(key, (0, 0))
+            delta = (
+                (row.views - seen_views) * self.view_weight
+                + (row.bookings - seen_bookings) * self.booking_weight
+            )
+            self._seen[key] = (row.views, row.bookings)
+            if delta:
+                bucket_middle = row.bucket_start.timestamp() + self.bucket_seconds / 2
+                age = max(now - bucket_middle, 0.0)
+                self._scores[row.post_id] = (
+                    self._scores.get(row.post_id, 0.0) + delta * math.exp(-self.decay_rate * age)
+                )
+
+        self._prune(window_start)
+        self._load_post_tags(db)
+        self._publish(db)
+        self._synced_at = synced_at
+        self.computed_at = now_dt
+        return len(rows)
+
+    def _prune(self, window_start: datetime) -> None:
+        self._seen = {key: value for key, value in self._seen.items() if key[1] >= window_start}
+        self._scores = {post_id: score for post_id, score in self._scores.items() if score >= MIN_SCORE}
+        self._post_tags = {
+            post_id: tags for post_id, tags in self._post_tags.items() if post_id in self._scores
+        }
+
+    def _load_post_tags(self, db: Session) -> None:
+        missing = [post_id for post_id in self._scores if post_id not in self._post_tags]
+        if missing:
+            rows = db.execute(select(Post.post_id, Post.tags).where(Post.post_id.in_(missing)))
+            for row in rows:
+                self._post_tags[row.post_id] = row.tags or []
+
+    def _publish(self, db: Session) -> None:
+        top = heapq.nlargest(self.top_k, self._scores.items(), key=lambda item: item[1])
+        posts = {}
+        if top:
+            rows = db.execute(
+                select(Post.post_id, Post.title, Post.image_url, Post.tags)
+                .where(Post.post_id.in_([post_id for post_id, _ in top]))
+            )
+            posts = {row.post_id: row._asdict() for row in rows}
+        self.top_posts = [
+            {**posts[post_id], "score": round(score, 4)} for post_id, score in top if post_id in posts
+        ]
+
+        tag_scores: Dict[str, float] = defaultdict(float)
+        for post_id, score in self._scores.items():
+            for tag in self._post_tags.get(post_id, ()):
+                tag_scores[tag] += score
+        self.top_tags = [
+            {"tag": tag, "score": round(score, 4)}
+            for tag, score in heapq.nlargest(self.top_k, tag_scores.items(), key=lambda item: item[1])
+        ]
+
+
+trending_recorder = TrendingRecorder(settings.trending_bucket_seconds, enabled=settings.trending_enabled)
+trending_ranker = TrendingRanker(
+    bucket_seconds=settings.trending_bucket_seconds,
+    half_life_seconds=settings.trending_half_life_hours * 3600,
+    window_seconds=settings.trending_window_hours * 3600,
+    view_weight=settings.trending_view_weight,
+    booking_weight=settings.trending_booking_weight,
+    top_k=settings.trending_top_k
+)
+
+
+def refresh_trending(db: Session) -> None:
+    """Запись накопленных событий и пересчет оценок"""
+    trending_recorder.flush(db)
+    trending_ranker.recompute(db)
@@ -0,0 +1,57 @@
+"""
+Отложенный учет просмотров
+
+В режиме deferred_view_counts просмотры копятся в памяти процесса
+и периодически записываются в posts одним UPDATE.
+"""
+import threading
+from collections import Counter
+from sqlalchemy import Integer, column, func, update, values
+from sqlalchemy.orm import Session
+from app.models.post import Post
+
+
+class ViewCounterBuffer:
+    """Буфер несохраненных просмотров по постам"""
+
+    def __init__(self):
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, post_id: int, count: int = 1) -> int:
+        """Учет просмотра; возвращает число несохраненных просмотров поста"""
+        with self._lock:
+            self._pending[post_id] += count
+            return self._pending[post_id]
+
+    def pending(self, post_id: int) -> int:
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self, db: Session) -> int:
+        """Запись накопленных просмотров одним UPDATE ... FROM (VALUES ...)"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        
+        increments = values(
+            column("post_id", Integer), column("views", Integer), name="increments"
+        ).data(list(pending.items()))
+        try:
+            db.execute(
+                update(Post)
+                .where(Post.post_id == increments.c.post_id)
+                .values(views_count=func.coalesce(Post.views_count, 0) + increments.c.views)
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Возвращаем просмотры в буфер, чтобы не потерять их
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return len(pending)
+
+
+view_counter = ViewCounterBuffer()
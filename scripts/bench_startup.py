@@ -0,0 +1,88 @@
+"""
+Замер времени старта приложения
+
+Импорт app.main измеряется в отдельном процессе (холодный интерпретатор),
+затем uvicorn запускается заново и опрашивается до первого ответа на / и до
+готовности /health/ready (пул соединений прогрет).
+
+Примеры:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --port 45555
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import os
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def measure_import() -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def _wait_for(url: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def measure_server(port: int, timeout: float):
+    """Время до первого ответа и до готовности с момента запуска процесса"""
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT
+    )
+    try:
+        deadline = started + timeout
+        if not _wait_for(f"{base_url}/", deadline):
+            raise RuntimeError("Server did not respond in time")
+        first_response = time.perf_counter() - started
+        if not _wait_for(f"{base_url}/health/ready", deadline):
+            raise RuntimeError("Server did not become ready in time")
+        ready = time.perf_counter() - started
+        return first_response, ready
+    finally:
+        process.terminate()
+        process.wait(timeout)
+
+
+def _report(name: str, values) -> None:
+    print(
+        f"{name:<16} median {statistics.median(values) * 1000:8.1f} ms   "
+        f"min {min(values) * 1000:8.1f} ms   max {max(values) * 1000:8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер времени старта приложения")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=45555)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--skip-server", action="store_true", help="Только время импорта")
+    args = parser.parse_args()
+
+    _report("import app.main", [measure_import() for _ in range(args.runs)])
+    if not args.skip_server:
+        results = [measure_server(args.port, args.timeout) for _ in range(args.runs)]
+        _report("first response", [first for first, _ in results])
+        _report("ready", [ready for _, ready in results])
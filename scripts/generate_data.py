@@ -0,0 +1,243 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования
+
+Создает пользователей, посты с большим словарем тегов, бронирования с
+«горячими» и «холодными» событиями и длинные ветки комментариев. Данные
+пишутся через COPY пачками; готовый набор можно сохранить в дамп и быстро
+восстановить.
+
+Примеры:
+    python scripts/generate_data.py --users 100000 --posts 20000 --bookings 2000000
+    python scripts/generate_data.py --snapshot data/perf.dump
+    python scripts/generate_data.py --restore data/perf.dump
+"""
+import argparse
+import random
+import subprocess
+import sys
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.engine import URL, make_url
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.crud.bulk import copy_rows, format_pg_array
+from app.database import SessionLocal
+
+WORDS = (
+    "матч концерт спектакль турнир фестиваль балет опера хоккей футбол баскетбол "
+    "премьера сезон финал кубок лига звезды сцена зал стадион арена вечер билеты "
+    "оркестр музыка театр шоу легенды чемпионат дерби гастроли программа"
+).split()
+
+
+def _pg_connection() -> Tuple[str, dict]:
+    """URL базы для pg_dump/pg_restore и окружение процесса
+
+    Пароль передается через PGPASSWORD: аргументы командной строки видны
+    всем пользователям хоста в ps.
+    """
+    url = make_url(settings.postgres_url).set(drivername="postgresql")
+    env = dict(os.environ)
+    if url.password is not None:
+        env["PGPASSWORD"] = str(url.password)
+    url = URL.create(url.drivername, url.username, None, url.host, url.port, url.database, url.query)
+    return url.render_as_string(hide_password=False), env
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(min_words, max_words))).capitalize()
+
+
+def _next_id(db, table: str, column: str) -> int:
+    return db.execute(text(f"SELECT coalesce(max({column}), 0) + 1 FROM {table}")).scalar()
+
+
+def _sync_sequence(db, table: str, column: str) -> None:
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+        f"(SELECT coalesce(max({column}), 1) FROM {table}))"
+    ))
+
+
+def _copy_in_batches(db, table: str, columns, rows, batch_size: int) -> int:
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += copy_rows(db, table, columns, batch)
+            batch = []
+    total += copy_rows(db, table, columns, batch)
+    return total
+
+
+def _booking_targets(rng: random.Random, args, post_count: int):
+    """Число бронирований на пост: доля hot_weight приходится на hot_share постов"""
+    hot_count = max(1, int(post_count * args.hot_share))
+    cold_count = max(1, post_count - hot_count)
+    hot_posts = set(rng.sample(range(post_count), hot_count))
+    targets = []
+    for index in range(post_count):
+        if index in hot_posts:
+            mean = args.bookings * args.hot_weight / hot_count
+        else:
+            mean = args.bookings * (1 - args.hot_weight) / cold_count
+        targets.append(min(args.users, max(0, int(rng.expovariate(1 / mean)) if mean else 0)))
+    return targets, hot_posts
+
+
+def generate(args) -> None:
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        first_user = _next_id(db, "users", "user_id")
+        first_post = _next_id(db, "posts", "post_id")
+        first_comment = _next_id(db, "comments", "comment_id")
+        password_hash = get_password_hash("password")  # bcrypt один раз на всех
+
+        # Пользователи
+        users = (
+            (first_user + i, f"User {first_user + i}", f"user{first_user + i}@perf.test", password_hash)
+            for i in range(args.users)
+        )
+        count = _copy_in_batches(
+            db, "users", ["user_id", "full_name", "email", "password_hash"], users, args.batch_size
+        )
+        print(f"users: {count}")
+
+        # Посты: словарь тегов с распределением Ципфа, горячие события
+        vocabulary = [f"{rng.choice(WORDS)}-{i}" for i in range(args.tags)]
+        tag_weights = [1 / (rank + 1) for rank in range(args.tags)]
+        targets, hot_posts = _booking_targets(rng, args, args.posts)
+        created = [now - timedelta(days=rng.uniform(0, args.days)) for _ in range(args.posts)]
+
+        def posts():
+            for i in range(args.posts):
+                tags = sorted(set(rng.choices(vocabulary, weights=tag_weights, k=rng.randint(1, 4))))
+                limit = max(targets[i] + rng.randint(0, 50), rng.randint(20, 500))
+                views = targets[i] * rng.randint(3, 20) + rng.randint(0, 100)
+                # Событие — через 1..90 дней после публикации (часть уже прошла)
+                event_at = created[i] + timedelta(days=rng.uniform(1, 90))
+                yield (
+                    first_post + i, _sentence(rng, 3, 8)[:70], _sentence(rng, 30, 150),
+                    format_pg_array(tags), limit, views, created[i], event_at
+                )
+
+        count = _copy_in_batches(
+            db, "posts",
+            ["post_id", "title", "text", "tags", "tickets_limit", "views_count", "created_at", "event_at"],
+            posts(), args.batch_size
+        )
+        print(f"posts: {count} (hot: {len(hot_posts)})")
+
+        # Бронирования: для каждого поста — выборка пользователей без повторов
+        def bookings():
+            for i, target in enumerate(targets):
+                for user_offset in rng.sample(range(args.users), target):
+                    yield first_post + i, first_user + user_offset
+
+        count = _copy_in_batches(db, "posts_users", ["post_id", "user_id"], bookings(), args.batch_size)
+        print(f"bookings: {count}")
+
+        # Комментарии: часть постов получает длинные ветки
+        long_threads = rng.sample(range(args.posts), min(args.long_threads, args.posts))
+        long_share = args.long_thread_share if long_threads else 0
+
+        def comments():
+            for i in range(args.comments):
+                if rng.random() < long_share:
+                    post_index = rng.choice(long_threads)
+                else:
+                    post_index = rng.randrange(args.posts)
+                age = (now - created[post_index]).total_seconds()
+                yield (
+                    first_comment + i, _sentence(rng, 5, 40), first_post + post_index,
+                    first_user + rng.randrange(args.users),
+                    created[post_index] + timedelta(seconds=rng.uniform(0, age))
+                )
+
+        count = _copy_in_batches(
+            db, "comments", ["comment_id", "text", "post_id", "user_id", "created_at"],
+            comments(), args.batch_size
+        )
+        print(f"comments: {count}")
+
+        for table, column in (("users", "user_id"), ("posts", "post_id"), ("comments", "comment_id")):
+            _sync_sequence(db, table, column)
+
+        # Денормализованная активность комментариев для новых постов
+        db.execute(text("""
+            UPDATE posts p
+            SET comment_count = s.cnt,
+                last_comment_at = s.created_at,
+                last_comment_preview = left(s.text, 140)
+            FROM (
+                SELECT DISTINCT ON (post_id)
+                    post_id, created_at, text,
+                    count(*) OVER (PARTITION BY post_id) AS cnt
+                FROM comments
+                WHERE post_id >= :first_post
+                ORDER BY post_id, created_at DESC, comment_id DESC
+            ) s
+            WHERE p.post_id = s.post_id
+        """), {"first_post": first_post})
+        db.commit()
+
+        for table in ("users", "posts", "posts_users", "comments"):
+            db.execute(text(f"ANALYZE {table}"))
+        db.commit()
+    finally:
+        db.close()
+    print(f"✅ Данные сгенерированы за {time.perf_counter() - started:.1f} c")
+
+
+def snapshot(path: str) -> None:
+    """Сохранение базы в дамп custom-формата (сжатый, с параллельным восстановлением)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    dsn, env = _pg_connection()
+    subprocess.run(["pg_dump", "--format=custom", f"--file={path}", f"--dbname={dsn}"], check=True, env=env)
+    print(f"✅ Снимок сохранен в {path}")
+
+
+def restore(path: str, jobs: int) -> None:
+    """Восстановление базы из дампа (существующие объекты пересоздаются)"""
+    dsn, env = _pg_connection()
+    subprocess.run([
+        "pg_restore", "--clean", "--if-exists", "--no-owner",
+        f"--jobs={jobs}", f"--dbname={dsn}", path
+    ], check=True, env=env)
+    print(f"✅ Снимок {path} восстановлен")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация данных для нагрузочного тестирования")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--bookings", type=int, default=1000000, help="Примерное число бронирований")
+    parser.add_argument("--comments", type=int, default=200000)
+    parser.add_argument("--tags", type=int, default=1000, help="Размер словаря тегов")
+    parser.add_argument("--hot-share", type=float, default=0.02, help="Доля горячих событий")
+    parser.add_argument("--hot-weight", type=float, default=0.6, help="Доля бронирований на горячие события")
+    parser.add_argument("--long-threads", type=int, default=20, help="Число постов с длинными ветками")
+    parser.add_argument("--long-thread-share", type=float, default=0.3, help="Доля комментариев в длинных ветках")
+    parser.add_argument("--days", type=int, default=365, help="Глубина дат создания постов")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--snapshot", metavar="PATH", help="Сохранить базу в дамп и выйти")
+    parser.add_argument("--restore", metavar="PATH", help="Восстановить базу из дампа и выйти")
+    parser.add_argument("--jobs", type=int, default=4, help="Параллельность pg_restore")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        snapshot(args.snapshot)
+    elif args.restore:
+        restore(args.restore, args.jobs)
+    else:
+        generate(args)
@@ -0,0 +1,47 @@
+"""
+Скрипт миграций базы данных
+
+Примеры:
+    python scripts/migrate.py upgrade
+    python scripts/migrate.py upgrade --target 5
+    python scripts/migrate.py status
+"""
+import argparse
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.migrations import MigrationRunner
+
+
+def upgrade(target=None):
+    """Применение ожидающих миграций"""
+    applied = MigrationRunner().upgrade(target)
+    if applied:
+        for migration in applied:
+            print(f"✅ {migration.version:04d}_{migration.name}")
+    else:
+        print("✅ База данных в актуальном состоянии")
+
+
+def status():
+    """Список миграций и время их применения"""
+    for migration in MigrationRunner().status():
+        applied_at = migration["applied_at"] or "pending"
+        print(f"{migration['version']:04d}_{migration['name']:<40} {applied_at}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Миграции базы данных")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Применить миграции")
+    upgrade_parser.add_argument("--target", type=int, help="Последняя применяемая версия")
+    subparsers.add_parser("status", help="Статус миграций")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.command == "upgrade":
+        upgrade(args.target)
+    else:
+        status()
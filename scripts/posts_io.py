@@ -0,0 +1,62 @@
+"""
+Скрипт массового импорта и экспорта постов
+
+Примеры:
+    python scripts/posts_io.py import catalog.ndjson
+    python scripts/posts_io.py import catalog.csv --format csv
+    python scripts/posts_io.py export posts.ndjson
+"""
+import argparse
+import json
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.post_import import FORMATS, iter_records, import_posts, export_posts
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.endswith(".csv") else "ndjson"
+
+
+def run_import(path: str, fmt: str, batch_size: int):
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8", newline="") as stream:
+            result = import_posts(db, iter_records(stream, fmt), batch_size=batch_size)
+    finally:
+        db.close()
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+def run_export(path: str, fmt: str):
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with open(path, "w", encoding="utf-8", newline="") as out:
+            for chunk in export_posts(db, fmt):
+                out.write(chunk)
+    finally:
+        db.close()
+    print(f"✅ Экспорт в {path} завершен за {time.perf_counter() - started:.2f} c")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт/экспорт постов")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    
+    fmt = _detect_format(args.path, args.format)
+    if args.command == "import":
+        run_import(args.path, fmt, args.batch_size)
+    else:
+        run_export(args.path, fmt)
@@ -0,0 +1,42 @@
+"""
+Сжатые копии загруженных файлов
+
+Создает file.br / file.gz рядом с файлами сжимаемых типов в uploads, чтобы
+/uploads отдавал их без сжатия на лету. Новые загрузки сжимаются сразу,
+скрипт нужен для файлов, загруженных раньше.
+
+Примеры:
+    python scripts/precompress_uploads.py
+    python scripts/precompress_uploads.py --dir uploads --force
+"""
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.middleware.compression import SIDECAR_EXTENSIONS, precompress_file
+
+
+def precompress(directory: str, force: bool = False) -> None:
+    created = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(tuple(SIDECAR_EXTENSIONS.values())):
+                continue
+            path = os.path.join(root, name)
+            sidecars = [path + extension for extension in SIDECAR_EXTENSIONS.values()]
+            if not force and any(
+                os.path.exists(sidecar) and os.path.getmtime(sidecar) >= os.path.getmtime(path)
+                for sidecar in sidecars
+            ):
+                continue
+            created += len(precompress_file(path))
+    print(f"✅ Создано сжатых копий: {created}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сжатые копии файлов в uploads")
+    parser.add_argument("--dir", default="uploads")
+    parser.add_argument("--force", action="store_true", help="Пересоздать существующие копии")
+    args = parser.parse_args()
+    precompress(args.dir, args.force)
@@ -3,16 +3,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
+from app.database import SessionLocal
 from app.models import User, Post
 from app.crud.user import create_user
-from app.crud.post import create_post
 from app.schemas.user import UserCreate
-from app.schemas.post import PostCreate
+from app.services.post_import import import_posts
 
-# Create database tables
-User.metadata.create_all(bind=engine)
-Post.metadata.create_all(bind=engine)
+# Таблицы создаются миграциями: python scripts/migrate.py upgrade
 
 def seed_database():
     db = SessionLocal()
@@ -85,12 +82,8 @@ def seed_database():
             }
         ]
         
-        for post_data in posts_data:
-            # Check if post already exists
-            existing_post = db.query(Post).filter(Post.title == post_data["title"]).first()
-            if not existing_post:
-                post_create = PostCreate(**post_data)
-                create_post(db, post_create)
+        # Посты загружаются одной пачкой; существующие (по названию) пропускаются
+        import_posts(db, enumerate(posts_data, start=1))
         
         db.commit()
         print("Database seeded successfully!")
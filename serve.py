@@ -0,0 +1,113 @@
+"""
+Запуск в production: несколько процессов uvicorn с uvloop и httptools
+
+Число процессов берется из SERVER_WORKERS или по числу доступных CPU.
+Лимит соединений PostgreSQL делится между процессами: каждый получает
+DB_POOL_SIZE/DB_MAX_OVERFLOW через окружение, так что сумма пулов не
+превышает DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS. В бюджет входит
+соединение блокировки лидерства планировщика (одно на процесс); пулы реплик
+(REPLICA_POOL_SIZE/REPLICA_MAX_OVERFLOW) ограничиваются тем же бюджетом на
+каждую реплику.
+"""
+import importlib.util
+import logging
+import os
+import uvicorn
+from app.core.config import settings
+
+logger = logging.getLogger("serve")
+
+
+def worker_count() -> int:
+    if settings.server_workers > 0:
+        return settings.server_workers
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))  # учитывает cpuset контейнера
+    return max(1, os.cpu_count() or 1)
+
+
+# Соединение процесса, постоянно занятое блокировкой лидерства планировщика
+# (LeaderLock берет его из пула primary)
+LEADER_CONNECTIONS = 1
+
+
+def _connection_budget(workers: int) -> int:
+    """Соединений на процесс из DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS"""
+    budget = settings.db_max_connections - settings.db_reserved_connections
+    per_worker = budget // workers
+    if per_worker < 1 + LEADER_CONNECTIONS:
+        raise RuntimeError(
+            f"{workers} workers do not fit into {budget} database connections; "
+            "lower SERVER_WORKERS or raise DB_MAX_CONNECTIONS"
+        )
+    return per_worker
+
+
+def _fit(per_worker: int, pool_size: int, max_overflow: int):
+    pool_size = min(pool_size, per_worker)
+    return pool_size, min(max_overflow, per_worker - pool_size)
+
+
+def pool_sizing(workers: int):
+    """(pool_size, max_overflow) пула primary на процесс в пределах бюджета соединений
+
+    Соединение блокировки лидерства входит в бюджет и добавляется к pool_size,
+    так что запросам остается DB_POOL_SIZE соединений (если бюджет позволяет).
+    """
+    per_worker = _connection_budget(workers) - LEADER_CONNECTIONS
+    pool_size, max_overflow = _fit(per_worker, settings.db_pool_size, settings.db_max_overflow)
+    return pool_size + LEADER_CONNECTIONS, max_overflow
+
+
+def replica_pool_sizing(workers: int):
+    """(pool_size, max_overflow) пула каждой реплики на процесс
+
+    Каждый процесс держит отдельный пул к каждой реплике. Реплики — другие
+    серверы, а у hot standby max_connections не меньше, чем у primary, поэтому
+    пулы к одной реплике ограничены тем же бюджетом, что и пулы primary.
+    """
+    return _fit(_connection_budget(workers), settings.replica_pool_size, settings.replica_max_overflow)
+
+
+def _available(module: str, fallback: str, preferred: str) -> str:
+    return preferred if importlib.util.find_spec(module) else fallback
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    workers = worker_count()
+    pool_size, max_overflow = pool_sizing(workers)
+    # Процессы uvicorn читают настройки заново — передаем размеры пула через окружение
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    if settings.replica_urls:
+        replica_pool_size, replica_max_overflow = replica_pool_sizing(workers)
+        os.environ["REPLICA_POOL_SIZE"] = str(replica_pool_size)
+        os.environ["REPLICA_MAX_OVERFLOW"] = str(replica_max_overflow)
+        logger.info(
+            "Replica pool %s+%s per worker for each of %s replicas",
+            replica_pool_size, replica_max_overflow, len(settings.replica_urls)
+        )
+    loop = _available("uvloop", "asyncio", "uvloop")
+    http = _available("httptools", "h11", "httptools")
+    logger.info(
+        "Starting %s workers (loop=%s, http=%s), pool %s+%s per worker",
+        workers, loop, http, pool_size, max_overflow
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keep_alive,
+        timeout_graceful_shutdown=settings.server_graceful_timeout,
+        proxy_headers=True,
+        access_log=False
+    )
+
+
+if __name__ == "__main__":
+    main()
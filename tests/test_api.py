@@ -136,6 +136,86 @@ def test_api():
     except Exception as e:
         print(f"❌ Ошибка при получении билетов: {e}")
     
+    # Тест 7.1: Архив билетов на прошедшие события
+    print("\n7.1. Тестирование архива билетов...")
+    try:
+        response = requests.get(f"{BASE_URL}/posts/my-tickets/archive/", headers=headers)
+        if response.status_code == 200:
+            print(f"✅ Получено {len(response.json())} архивных билетов")
+        else:
+            print(f"❌ Ошибка получения архива билетов: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Ошибка при получении архива билетов: {e}")
+    
+    # Тест 8: Полнотекстовый поиск
+    print("\n8. Тестирование поиска...")
+    try:
+        response = requests.get(f"{BASE_URL}/posts/search/", params={"q": "Щелкунчик"})
+        if response.status_code == 200:
+            page = response.json()
+            print(f"✅ Найдено {len(page['items'])} постов")
+            if page["items"]:
+                print(f"   Первый результат: {page['items'][0]['title_highlight']}")
+        else:
+            print(f"❌ Ошибка поиска: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Ошибка при поиске: {e}")
+    
+    # Тест 9: Фильтрация с фасетами
+    print("\n9. Тестирование фильтрации постов...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/posts/filter/",
+            params={"tags": ["театр", "футбол"], "only_available": True, "sort": "popular"}
+        )
+        if response.status_code == 200:
+            page = response.json()
+            print(f"✅ Найдено {page['total']} постов, фасетов: {len(page['facets'])}")
+        else:
+            print(f"❌ Ошибка фильтрации: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Ошибка при фильтрации: {e}")
+    
+    # Тест 10: Обновление токенов и выход
+    print("\n10. Тестирование refresh-токена и выхода...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/auth/refresh", json={"refresh_token": user_data.get("refresh_token")}
+        )
+        if response.status_code == 200:
+            pair = response.json()
+            print("✅ Токены обновлены")
+            new_headers = {"Authorization": f"Bearer {pair['token']}"}
+            response = requests.post(
+                f"{BASE_URL}/auth/logout", json={"refresh_token": pair["refresh_token"]}, headers=new_headers
+            )
+            after = requests.get(f"{BASE_URL}/auth/me", headers=new_headers)
+            if response.status_code == 200 and after.status_code == 401:
+                print("✅ Выход выполнен, токен отозван")
+            else:
+                print(f"❌ Ошибка выхода: {response.status_code}, /auth/me после выхода: {after.status_code}")
+        else:
+            print(f"❌ Ошибка обновления токенов: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Ошибка при обновлении токенов: {e}")
+
+    # Тест 11: Краткий вид списка постов
+    print("\n11. Тестирование view=summary и fields...")
+    try:
+        summary = requests.get(f"{BASE_URL}/posts/", params={"view": "summary", "limit": 5})
+        sparse = requests.get(f"{BASE_URL}/posts/", params={"fields": "post_id,title", "limit": 5})
+        if summary.status_code == 200 and sparse.status_code == 200:
+            has_text = any("text" in post for post in summary.json())
+            keys = {key for post in sparse.json() for key in post}
+            if not has_text and keys <= {"post_id", "title"}:
+                print("✅ Ответы содержат только запрошенные поля")
+            else:
+                print(f"❌ Лишние поля в ответе: {keys}")
+        else:
+            print(f"❌ Ошибка получения краткого списка: {summary.status_code}, {sparse.status_code}")
+    except Exception as e:
+        print(f"❌ Ошибка при получении краткого списка: {e}")
+
     print("\n" + "=" * 50)
     print("🎉 Тестирование завершено!")
     print("\nДля полного тестирования API откройте:")